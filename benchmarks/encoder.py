@@ -0,0 +1,59 @@
+"""
+Compare the incremental and one-shot FRED encoders and the delegation of
+JSON-compatible subtrees to the json module.
+
+Run from the repository root with::
+
+    $ python -m benchmarks.encoder
+"""
+import timeit
+from datetime import date
+
+from fred import Tag, Symbol
+from fred.encoder import FREDEncoder
+
+
+def wide(n=10_000):
+    return [
+        {"id": i, "name": f"item-{i}", "price": i * 1.5, "tags": [Symbol("a"), "b"], "day": date(2000, 1, 1)}
+        for i in range(n)
+    ]
+
+
+def deep(n=50, width=20):
+    data = list(range(width))
+    for i in range(n):
+        data = Tag("node", {"depth": i, "children": [data, {"leaf": True}]})
+    return data
+
+
+def plain(n=10_000):
+    return Tag("items", [
+        {"id": i, "name": f"item-{i}", "price": i * 1.5, "tags": ["a", "b"], "sub": {"ok": True}}
+        for i in range(n)
+    ])
+
+
+def bench_json(name, obj, number=10, **kwargs):
+    enc = FREDEncoder(**kwargs)
+    json_enc = FREDEncoder(use_json=True, **kwargs)
+    fred = min(timeit.repeat(lambda: enc.encode(obj), number=number, repeat=3))
+    json = min(timeit.repeat(lambda: json_enc.encode(obj), number=number, repeat=3))
+    print(f"{name:<20} encode: {fred:.3f}s  use_json: {json:.3f}s  speedup: {fred / json:.2f}x")
+
+
+def bench(name, obj, number=10, **kwargs):
+    enc = FREDEncoder(**kwargs)
+    assert "".join(enc.iterencode(obj)) == enc.encode(obj)
+    incremental = min(timeit.repeat(lambda: "".join(enc.iterencode(obj)), number=number, repeat=3))
+    one_shot = min(timeit.repeat(lambda: enc.encode(obj), number=number, repeat=3))
+    print(f"{name:<20} iterencode: {incremental:.3f}s  encode: {one_shot:.3f}s  "
+          f"speedup: {incremental / one_shot:.2f}x")
+
+
+if __name__ == "__main__":
+    bench("wide", wide())
+    bench("wide (indent=4)", wide(), indent=4)
+    bench("deep", deep(), number=100)
+    bench("deep (indent=4)", deep(), number=100, indent=4)
+    bench_json("plain", plain())
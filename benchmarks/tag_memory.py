@@ -0,0 +1,53 @@
+"""
+Measure the memory used by decoded tags with and without the compact_tags
+option and by repetitive documents decoded with hash consing.
+
+Run from the repository root with::
+
+    $ python -m benchmarks.tag_memory
+"""
+import gc
+import tracemalloc
+
+from fred import loads
+from fred.hashcons import HashCons
+
+
+def source(n=100_000):
+    return "[" + " ".join(f"point [{i} {i + 1}]" for i in range(n)) + "]"
+
+
+def measure(src, **kwargs):
+    gc.collect()
+    tracemalloc.start()
+    data = loads(src, **kwargs)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def bench(n=100_000):
+    src = source(n)
+    regular = measure(src)
+    compact = measure(src, compact_tags=True)
+    print(f"{n} tags  regular: {regular / n:.1f} B/node  compact: {compact / n:.1f} B/node  "
+          f"saved: {(regular - compact) / n:.1f} B/node")
+
+
+def bench_hash_cons(n=5_000):
+    src = "[" + " ".join(
+        f'{{id: {i % 10} unit: m (scale=1) "meter" loc: {{lat: 48.85 lon: 2.35}} tags: [$a $b]}}'
+        for i in range(n)
+    ) + "]"
+    regular = measure(src, frozen=True)
+    shared = measure(src, hash_cons=True)
+    table = HashCons()
+    loads(src, hash_cons=table)
+    print(f"{n} records  frozen: {regular / n:.1f} B/record  hash_cons: {shared / n:.1f} B/record  "
+          f"dedup ratio: {table.ratio:.2f}")
+
+
+if __name__ == "__main__":
+    bench()
+    bench_hash_cons()
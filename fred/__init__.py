@@ -2,21 +2,36 @@
 FRED (Flexible REpresentation of Data) is a simple text-based format that
 extends JSON with some interesting capabilities.
 """
+import io as _io
 from json import detect_encoding
 from pathlib import Path as _Path
 from typing import Type as _Type, Iterator as _Iterator, Union as _Union
 
 from lark import Token as _Token
 
+from .canonical import hash
+from .columns import loads_columns
 from .decoder import FRED, FREDDecoder, fred_grammar as _grammar
-from .encoder import FREDEncoder
+from .encoder import (
+    FREDEncoder,
+    CHUNK_SIZE as _CHUNK_SIZE,
+    coalesce as _coalesce,
+    iterencode_parallel as _iterencode_parallel,
+)
 from .exceptions import FREDDecodeError
-from .types import Tag, FrozenTag, Symbol
+from .types import Tag, FrozenTag, FrozenDict, Symbol
 
 __version__ = "0.1.0"
 
+# hash is left out, so that star imports do not shadow the builtin
+__all__ = [
+    "dump", "dumps", "dumpb", "load", "loads", "lex", "loads_columns",
+    "FRED", "FREDDecoder", "FREDEncoder", "FREDDecodeError",
+    "Tag", "FrozenTag", "FrozenDict", "Symbol",
+]
 
-def dump(obj, fd=None, **kwargs):
+
+def dump(obj, fd=None, chunk_size=_CHUNK_SIZE, workers=None, **kwargs):
     """
     Serialize ``obj`` to a FRED formatted stream using ``fd``'s write method.
 
@@ -24,26 +39,67 @@ def dump(obj, fd=None, **kwargs):
         obj:
             A FRED-serializable object.
         fd:
-            A file descriptor.
+            A file descriptor opened in text or binary mode. Binary files
+            receive UTF-8 encoded data.
+        chunk_size:
+            Output is buffered and written in chunks of approximately this
+            number of characters (64 KiB by default).
+        workers:
+            If given, large top-level lists are encoded in parallel by this
+            many processes (see :func:`dumps`).
         indent:
             Indentation for pretty-printed representations.
     """
     write = fd.write
-    for chunk in FREDEncoder(**kwargs).iterencode(obj):
-        write(chunk)
+    binary = _is_binary(fd)
+    if binary:
+        kwargs.setdefault("ensure_ascii", False)
+
+    if workers is None:
+        chunks = FREDEncoder(**kwargs).iterencode(obj, chunk_size=chunk_size)
+    else:
+        chunks = _coalesce(_iterencode_parallel(obj, workers, **kwargs), chunk_size)
+
+    if binary:
+        for chunk in chunks:
+            write(chunk.encode("utf-8"))
+    else:
+        for chunk in chunks:
+            write(chunk)
 
 
-def dumps(obj, **kwargs) -> str:
+def dumps(obj, workers=None, **kwargs) -> str:
     """
     Serialize ``obj`` to a FRED formatted string.
 
     Args:
         obj:
             A FRED-serializable object.
+        workers:
+            If given, top-level lists and tagged lists are split into slices
+            encoded in parallel by this many processes. The output is the
+            same, but encoder arguments such as ``default`` must be
+            picklable.
     """
+    if workers is not None:
+        return "".join(_iterencode_parallel(obj, workers, **kwargs))
     return FREDEncoder(**kwargs).encode(obj)
 
 
+def dumpb(obj, **kwargs) -> bytes:
+    """
+    Serialize ``obj`` to UTF-8 encoded FRED.
+
+    Non-ASCII characters are not escaped, unless ensure_ascii=True is given.
+
+    Args:
+        obj:
+            A FRED-serializable object.
+    """
+    kwargs.setdefault("ensure_ascii", False)
+    return FREDEncoder(**kwargs).encode(obj).encode("utf-8")
+
+
 def load(fd, **kwargs) -> FRED:
     """
     Load FRED data from a file-like object.
@@ -87,6 +143,12 @@ def loads(src: _Union[str, bytes], cls: _Type[FREDDecoder] = None, **kwargs) ->
     return dec.decode(src)
 
 
+def _is_binary(fd) -> bool:
+    if isinstance(fd, _io.TextIOBase):
+        return False
+    return isinstance(fd, (_io.RawIOBase, _io.BufferedIOBase)) or "b" in getattr(fd, "mode", "")
+
+
 def lex(src: str) -> _Iterator[_Token]:
     """
     Return an iterator over tokens of a FRED document.
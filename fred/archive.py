@@ -0,0 +1,212 @@
+"""
+Archives of FRED documents indexed by key.
+
+An archive is a single file with the encoded documents followed by an index
+and a footer::
+
+    [document]...[index][index offset, index size, magic]
+
+The index is a binary FRED object that maps keys to the offset, size and
+format of each document. Readers map the file into memory and only decode the
+requested documents. Writers opened in append mode add documents and a new
+index after the old footer, which is reclaimed by :func:`compact`.
+"""
+import mmap
+import os
+from struct import Struct
+from typing import Iterator, Tuple, Any
+
+from . import dumpb, loads
+from .binary import dumps as dumps_binary, loads as loads_binary
+from .exceptions import FREDDecodeError
+
+MAGIC = b"FRA\x01"
+FOOTER = Struct("<QQ4s")
+
+
+class Writer:
+    """
+    Write documents to an archive.
+
+    Args:
+        path:
+            Path of the archive file.
+        mode:
+            "w" creates a new archive and "a" appends to an existing one.
+            Documents written with an existing key replace the old ones.
+        binary:
+            If True, documents are stored in the binary FRED format, otherwise
+            they are stored as UTF-8 encoded FRED text.
+        kwargs:
+            Arguments passed to the encoder.
+    """
+
+    def __init__(self, path, mode="w", binary=True, **kwargs):
+        if mode not in ("w", "a"):
+            raise ValueError(f"invalid mode: {mode!r}")
+
+        self.path = path
+        self.binary = binary
+        self._kwargs = kwargs
+        if mode == "a" and os.path.exists(path):
+            self._index = _read_index(path)
+            self._fd = open(path, "ab")
+        else:
+            self._index = {}
+            self._fd = open(path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def add(self, key: str, obj):
+        """
+        Encode and append obj to the archive under the given key.
+        """
+        if self.binary:
+            data = dumps_binary(obj, **self._kwargs)
+        else:
+            data = dumpb(obj, **self._kwargs)
+        self.add_raw(key, data, self.binary)
+
+    def add_raw(self, key: str, data: bytes, is_binary: bool):
+        """
+        Append an encoded document to the archive under the given key.
+        """
+        if not isinstance(key, str):
+            raise TypeError(f"keys must be strings, not {type(key).__name__}")
+        offset = self._fd.tell()
+        self._fd.write(data)
+        self._index[key] = [offset, len(data), is_binary]
+
+    def close(self):
+        """
+        Write the index and close the file.
+        """
+        if self._fd.closed:
+            return
+        offset = self._fd.tell()
+        data = dumps_binary(self._index)
+        self._fd.write(data)
+        self._fd.write(FOOTER.pack(offset, len(data), MAGIC))
+        self._fd.close()
+
+
+class Reader:
+    """
+    Read documents from an archive.
+
+    Documents are decoded on access. Iteration and the keys(), values() and
+    items() methods follow the order of keys. Keyword arguments are passed to
+    the decoder of documents stored as text.
+    """
+
+    def __init__(self, path, **kwargs):
+        self.path = path
+        self._kwargs = kwargs
+        with open(path, "rb") as fd:
+            self._mmap = _map_file(fd)
+        try:
+            self._index = _parse_index(self._mmap)
+        except Exception:
+            self._mmap.close()
+            raise
+        self._keys = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __getitem__(self, key: str):
+        data, is_binary = self.get_raw(key)
+        if is_binary:
+            return loads_binary(data)
+        return loads(data, **self._kwargs)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def get(self, key: str, default=None):
+        """
+        Return the document stored under key or default.
+        """
+        if key in self._index:
+            return self[key]
+        return default
+
+    def get_raw(self, key: str) -> Tuple[bytes, bool]:
+        """
+        Return the encoded document stored under key and a flag telling if it
+        is in the binary format.
+        """
+        offset, size, is_binary = self._index[key]
+        return self._mmap[offset:offset + size], is_binary
+
+    def keys(self) -> list:
+        """
+        Return the sorted list of keys.
+        """
+        if self._keys is None:
+            self._keys = sorted(self._index)
+        return self._keys
+
+    def values(self) -> Iterator[Any]:
+        return (self[key] for key in self.keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((key, self[key]) for key in self.keys())
+
+    def close(self):
+        self._mmap.close()
+
+
+def compact(path, target=None):
+    """
+    Rewrite an archive keeping only the current version of each document,
+    sorted by key, and a single index.
+
+    If no target path is given, the archive is replaced in place.
+    """
+    tmp = f"{path}.tmp" if target is None else target
+    with Reader(path) as reader, Writer(tmp) as writer:
+        for key in reader.keys():
+            writer.add_raw(key, *reader.get_raw(key))
+    if target is None:
+        os.replace(tmp, path)
+
+
+def _map_file(fd) -> mmap.mmap:
+    # Empty files cannot be mapped
+    if os.fstat(fd.fileno()).st_size < FOOTER.size:
+        raise FREDDecodeError("not a FRED archive", None, None)
+    return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_index(path) -> dict:
+    with open(path, "rb") as fd, _map_file(fd) as data:
+        return _parse_index(data)
+
+
+def _parse_index(data) -> dict:
+    if len(data) < FOOTER.size:
+        raise FREDDecodeError("not a FRED archive", None, None)
+    offset, size, magic = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+    if magic != MAGIC or offset + size + FOOTER.size > len(data):
+        raise FREDDecodeError("not a FRED archive", None, None)
+    return loads_binary(data[offset:offset + size])
@@ -0,0 +1,70 @@
+"""
+Typed numeric arrays.
+
+Arrays of numbers can be written as tagged lists named after their element
+type, e.g., ``f64 [1.0 2.5]`` or ``u8 [0 255]``. Decoders created with the
+``typed_arrays`` option convert them to compact array.array or NumPy arrays
+and the encoder writes array.array instances in this form.
+"""
+from array import array
+from typing import Callable
+
+from .types import Tag
+
+# Element types and the array.array typecodes that implement them
+ARRAY_TAGS = {}
+TYPECODES = {}
+for _code in "bBhHiIlLqQfd":
+    _size = array(_code).itemsize * 8
+    if _code in "fd":
+        _tag = f"f{_size}"
+    else:
+        _tag = f"{'u' if _code.isupper() else 'i'}{_size}"
+    ARRAY_TAGS[_code] = _tag
+    TYPECODES.setdefault(_tag, _code)
+del _code, _size, _tag
+
+NUMPY_DTYPES = {
+    tag: ("float" if tag[0] == "f" else "uint" if tag[0] == "u" else "int") + tag[1:]
+    for tag in TYPECODES
+}
+
+
+def array_tag_hook(kind="array", tag_hook: Callable = None) -> Callable:
+    """
+    Return a tag hook that converts typed numeric lists to arrays of the
+    given kind ("array" or "numpy") and handles other tags with tag_hook.
+    """
+    tag_hook = tag_hook or Tag.new
+    if kind == "numpy":
+        import numpy as np
+
+        types = {tag: np.dtype(dtype) for tag, dtype in NUMPY_DTYPES.items()}
+
+        def make(dtype, value):
+            # Unlike array.array, NumPy converts strings and silently truncates
+            # or wraps numbers that do not fit in the element type
+            arr = np.asarray(value)
+            if arr.ndim != 1 or arr.dtype.kind not in "biuf":
+                raise TypeError
+            with np.errstate(invalid="ignore", over="ignore"):
+                result = arr.astype(dtype)
+            if dtype.kind != "f" and not (result == arr).all():
+                raise TypeError
+            return result
+
+    elif kind == "array":
+        types = TYPECODES
+        make = array
+    else:
+        raise ValueError(f"invalid kind of array: {kind!r}")
+
+    def hook(tag, attrs, value):
+        if not attrs and type(value) in (list, tuple) and tag in types:
+            try:
+                return make(types[tag], value)
+            except (TypeError, OverflowError):
+                raise ValueError(f"invalid element in {tag} array")
+        return tag_hook(tag, attrs, value)
+
+    return hook
@@ -0,0 +1,435 @@
+"""
+Compact binary encoding of the FRED data model.
+
+Values are written as a type code followed by their payload. Integers and
+lengths are stored as varints (LEB128, with zig-zag encoding for signed
+numbers), floats as 8 byte IEEE doubles and text as UTF-8. Object keys, tag
+names, attribute names and symbols are written once and referred by their
+position in a string table afterwards.
+
+Keys are normalized as in the text format, so that
+``binary.loads(binary.dumps(x)) == fred.loads(fred.dumps(x))``.
+"""
+from datetime import date, time, datetime, timedelta, timezone
+from struct import Struct, error as StructError
+from typing import Callable, Any
+
+from .exceptions import FREDDecodeError
+from .types import Symbol, Tag, FrozenTag, FrozenDict
+
+MAGIC = b"FRB\x01"
+
+NULL = 0x00
+FALSE = 0x01
+TRUE = 0x02
+INT = 0x03
+FLOAT = 0x04
+STRING = 0x05
+BYTES = 0x06
+LIST = 0x07
+DICT = 0x08
+SYMBOL = 0x09
+TAG = 0x0A
+DATE = 0x0B
+TIME = 0x0C
+TIME_TZ = 0x0D
+DATETIME = 0x0E
+DATETIME_TZ = 0x0F
+
+DOUBLE = Struct("<d")
+NAN = bytes.fromhex("000000000000f87f")
+
+
+def dumps(obj, default: Callable[[Any], Any] = None) -> bytes:
+    """
+    Serialize ``obj`` to the binary FRED format.
+
+    Args:
+        obj:
+            A FRED-serializable object.
+        default:
+            Called with objects that cannot be otherwise serialized. It should
+            return a serializable version of the object or raise TypeError.
+    """
+    out = bytearray(MAGIC)
+    _make_encoder(out, default)(obj)
+    return bytes(out)
+
+
+def dump(obj, fd, **kwargs):
+    """
+    Serialize ``obj`` to the binary FRED format and write it to ``fd``.
+    """
+    fd.write(dumps(obj, **kwargs))
+
+
+def loads(data: bytes):
+    """
+    Load FRED data from bytes in the binary format.
+    """
+    data = bytes(data)
+    if data[:len(MAGIC)] != MAGIC:
+        raise FREDDecodeError("invalid header, not a binary FRED document", None, None)
+    obj, end = _make_decoder(data)(len(MAGIC))
+    if end != len(data):
+        raise FREDDecodeError(f"extra data at position {end}", None, None)
+    return obj
+
+
+def load(fd):
+    """
+    Load FRED data from a file-like object opened in binary mode.
+    """
+    return loads(fd.read())
+
+
+def normalize_key(key) -> str:
+    """
+    Convert key to the string it would be decoded as in the text format.
+    """
+    if isinstance(key, str):
+        return str(key)
+    elif key is True:
+        return "true"
+    elif key is False:
+        return "false"
+    elif key is None:
+        return "null"
+    elif isinstance(key, (int, float, Symbol)):
+        return str(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+#
+# Encoder
+#
+def _make_encoder(out: bytearray, default, canonical=False, flush=None, chunk_size=0):
+    """
+    Return a function that writes the encoding of its argument to out.
+
+    The canonical variant, used by :mod:`fred.canonical`, writes names inline
+    instead of using a string table, sorts the entries of objects and
+    attributes by key and writes a single NaN. If flush is given, it is called
+    when out grows beyond chunk_size.
+    """
+    append = out.append
+    extend = out.extend
+    pack_double = DOUBLE.pack
+
+    def write_uint(n):
+        while n >= 0x80:
+            append((n & 0x7F) | 0x80)
+            n >>= 7
+        append(n)
+
+    def write_int(n):
+        write_uint(n << 1 if n >= 0 else (-n << 1) - 1)
+
+    def write_text(st):
+        data = st.encode("utf-8", "surrogatepass")
+        write_uint(len(data))
+        extend(data)
+
+    def write_tz(obj):
+        write_int(obj.utcoffset() // timedelta(seconds=1))
+
+    if canonical:
+        write_ref = write_text
+
+        def write_entries(mapping):
+            entries = {}
+            for key, value in mapping.items():
+                key = normalize_key(key)
+                if key in entries:
+                    raise ValueError(f"duplicate key after normalization: {key!r}")
+                entries[key] = value
+
+            write_uint(len(entries))
+            for key in sorted(entries, key=lambda k: k.encode("utf-8", "surrogatepass")):
+                write_text(key)
+                encode(entries[key])
+                if flush is not None and len(out) >= chunk_size:
+                    flush()
+
+    else:
+        strings = {}
+
+        def write_ref(st):
+            # References are 1-based positions in the string table. Zero means a
+            # new string follows inline.
+            try:
+                write_uint(strings[st])
+            except KeyError:
+                strings[st] = len(strings) + 1
+                append(0)
+                write_text(st)
+
+        def write_entries(mapping):
+            write_uint(len(mapping))
+            for key, value in mapping.items():
+                write_ref(key if type(key) is str else normalize_key(key))
+                encode(value)
+
+    def encode_none(obj):
+        append(NULL)
+
+    def encode_bool(obj):
+        append(TRUE if obj else FALSE)
+
+    def encode_int(obj):
+        append(INT)
+        write_int(obj)
+
+    def encode_float(obj):
+        append(FLOAT)
+        extend(NAN if canonical and obj != obj else pack_double(obj))
+
+    def encode_str(obj):
+        append(STRING)
+        write_text(obj)
+
+    def encode_bytes(obj):
+        append(BYTES)
+        write_uint(len(obj))
+        extend(obj)
+
+    def encode_symbol(obj):
+        append(SYMBOL)
+        write_ref(str(obj))
+
+    def encode_list(obj):
+        append(LIST)
+        write_uint(len(obj))
+        for item in obj:
+            encode(item)
+            if flush is not None and len(out) >= chunk_size:
+                flush()
+
+    def encode_dict(obj):
+        append(DICT)
+        write_entries(obj)
+
+    def encode_tag(obj):
+        tag, attrs, value = obj.split()
+        append(TAG)
+        write_ref(tag)
+        write_entries(attrs)
+        encode(value)
+
+    def encode_date(obj):
+        append(DATE)
+        write_uint(obj.toordinal())
+
+    def encode_time(obj):
+        append(TIME if obj.tzinfo is None else TIME_TZ)
+        write_uint(obj.hour * 3600 + obj.minute * 60 + obj.second)
+        write_uint(obj.microsecond)
+        if obj.tzinfo is not None:
+            write_tz(obj)
+
+    def encode_datetime(obj):
+        append(DATETIME if obj.tzinfo is None else DATETIME_TZ)
+        write_uint(obj.toordinal())
+        write_uint(obj.hour * 3600 + obj.minute * 60 + obj.second)
+        write_uint(obj.microsecond)
+        if obj.tzinfo is not None:
+            write_tz(obj)
+
+    encoders = {
+        type(None): encode_none,
+        bool: encode_bool,
+        int: encode_int,
+        float: encode_float,
+        str: encode_str,
+        bytes: encode_bytes,
+        Symbol: encode_symbol,
+        list: encode_list,
+        tuple: encode_list,
+        dict: encode_dict,
+        FrozenDict: encode_dict,
+        Tag: encode_tag,
+        FrozenTag: encode_tag,
+        date: encode_date,
+        time: encode_time,
+        datetime: encode_datetime,
+    }
+    subclasses = (
+        (bool, encode_bool),
+        (int, encode_int),
+        (float, encode_float),
+        (Symbol, encode_symbol),
+        (str, encode_str),
+        (bytes, encode_bytes),
+        (Tag, encode_tag),
+        ((list, tuple), encode_list),
+        (dict, encode_dict),
+        (datetime, encode_datetime),
+        (date, encode_date),
+        (time, encode_time),
+    )
+
+    def encode(obj):
+        try:
+            fn = encoders[type(obj)]
+        except KeyError:
+            for cls, fn in subclasses:
+                if isinstance(obj, cls):
+                    break
+            else:
+                if default is None:
+                    msg = f"Object of type {type(obj).__name__} is not FRED serializable"
+                    raise TypeError(msg)
+                return encode(default(obj))
+        fn(obj)
+
+    return encode
+
+
+#
+# Decoder
+#
+def _make_decoder(data: bytes):
+    strings = []
+    unpack_double = DOUBLE.unpack_from
+
+    def read_uint(pos):
+        byte = data[pos]
+        if byte < 0x80:
+            return byte, pos + 1
+        n = byte & 0x7F
+        shift = 7
+        while True:
+            pos += 1
+            byte = data[pos]
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return n, pos + 1
+            shift += 7
+
+    def read_int(pos):
+        n, pos = read_uint(pos)
+        return (n >> 1) ^ -(n & 1), pos
+
+    def read_text(pos):
+        size, pos = read_uint(pos)
+        end = pos + size
+        if end > len(data):
+            raise IndexError
+        return data[pos:end].decode("utf-8", "surrogatepass"), end
+
+    def read_ref(pos):
+        idx, pos = read_uint(pos)
+        if idx:
+            return strings[idx - 1], pos
+        st, pos = read_text(pos)
+        strings.append(st)
+        return st, pos
+
+    def read_tz(pos):
+        seconds, pos = read_int(pos)
+        return timezone(timedelta(seconds=seconds)), pos
+
+    def read_clock(pos):
+        seconds, pos = read_uint(pos)
+        microsecond, pos = read_uint(pos)
+        hour, seconds = divmod(seconds, 3600)
+        minute, second = divmod(seconds, 60)
+        return hour, minute, second, microsecond, pos
+
+    def decode_int(pos):
+        return read_int(pos)
+
+    def decode_float(pos):
+        return unpack_double(data, pos)[0], pos + 8
+
+    def decode_bytes(pos):
+        size, pos = read_uint(pos)
+        end = pos + size
+        if end > len(data):
+            raise IndexError
+        return data[pos:end], end
+
+    def decode_symbol(pos):
+        st, pos = read_ref(pos)
+        return Symbol(st), pos
+
+    def decode_list(pos):
+        size, pos = read_uint(pos)
+        result = []
+        append = result.append
+        for _ in range(size):
+            item, pos = decode(pos)
+            append(item)
+        return result, pos
+
+    def decode_pairs(pos):
+        size, pos = read_uint(pos)
+        result = {}
+        for _ in range(size):
+            key, pos = read_ref(pos)
+            result[key], pos = decode(pos)
+        return result, pos
+
+    def decode_tag(pos):
+        tag, pos = read_ref(pos)
+        attrs, pos = decode_pairs(pos)
+        value, pos = decode(pos)
+        return Tag.new(tag, attrs, value), pos
+
+    def decode_date(pos):
+        ordinal, pos = read_uint(pos)
+        return date.fromordinal(ordinal), pos
+
+    def decode_time(pos, tz=False):
+        hour, minute, second, microsecond, pos = read_clock(pos)
+        tzinfo = None
+        if tz:
+            tzinfo, pos = read_tz(pos)
+        return time(hour, minute, second, microsecond, tzinfo), pos
+
+    def decode_datetime(pos, tz=False):
+        ordinal, pos = read_uint(pos)
+        day = date.fromordinal(ordinal)
+        hour, minute, second, microsecond, pos = read_clock(pos)
+        tzinfo = None
+        if tz:
+            tzinfo, pos = read_tz(pos)
+        return datetime(day.year, day.month, day.day, hour, minute, second, microsecond, tzinfo), pos
+
+    decoders = {
+        NULL: lambda pos: (None, pos),
+        FALSE: lambda pos: (False, pos),
+        TRUE: lambda pos: (True, pos),
+        INT: decode_int,
+        FLOAT: decode_float,
+        STRING: read_text,
+        BYTES: decode_bytes,
+        LIST: decode_list,
+        DICT: decode_pairs,
+        SYMBOL: decode_symbol,
+        TAG: decode_tag,
+        DATE: decode_date,
+        TIME: decode_time,
+        TIME_TZ: lambda pos: decode_time(pos, tz=True),
+        DATETIME: decode_datetime,
+        DATETIME_TZ: lambda pos: decode_datetime(pos, tz=True),
+    }
+
+    def decode(pos):
+        try:
+            fn = decoders[data[pos]]
+        except KeyError:
+            raise FREDDecodeError(f"invalid type code {data[pos]:#04x} at position {pos}", None, None)
+        except IndexError:
+            raise FREDDecodeError("unexpected end of data", None, None)
+        return fn(pos + 1)
+
+    def safe_decode(pos):
+        try:
+            return decode(pos)
+        except (IndexError, UnicodeDecodeError, ValueError, StructError) as exc:
+            if isinstance(exc, FREDDecodeError):
+                raise
+            raise FREDDecodeError(f"invalid binary FRED data: {exc}", None, None) from exc
+
+    return safe_decode
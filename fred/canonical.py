@@ -0,0 +1,90 @@
+"""
+Canonical encoding and structural hashing of FRED values.
+
+The canonical form is a byte string that only depends on the FRED value, so
+that equal documents produce the same bytes in any implementation. It starts
+with the 4 byte header ``FRC\\x01``, followed by the encoding of the value:
+
+* ``null``, ``false`` and ``true`` are the single bytes 0x00, 0x01 and 0x02.
+* Integers are 0x03 followed by a zig-zag encoded unsigned LEB128 varint,
+  always in its shortest form.
+* Floats are 0x04 followed by the 8 byte little-endian IEEE 754 double. All
+  NaNs are written as ``00 00 00 00 00 00 f8 7f``. ``0.0`` and ``-0.0`` are
+  distinct.
+* Strings, byte strings and symbols are 0x05, 0x06 and 0x09, followed by the
+  length as a varint and the UTF-8 text (or the raw bytes).
+* Arrays are 0x07, the number of items as a varint and the items.
+* Objects are 0x08, the number of entries as a varint and the entries sorted
+  by the UTF-8 bytes of their keys. Each entry is the key, written as
+  varint length and UTF-8 text, followed by the value. Keys are normalized as
+  in the text format, so ``{1: x}`` and ``{"1": x}`` are the same object.
+* Tags are 0x0A, the tag name (varint length and UTF-8 text), the attributes
+  encoded as the entries of an object and the value.
+* Dates are 0x0B and the proleptic Gregorian ordinal as a varint. Times and
+  datetimes are 0x0C/0x0D and 0x0E/0x0F (without/with timezone). Datetimes
+  write the ordinal of the date, then the seconds since midnight and the
+  microseconds as varints and, for values with a timezone, the UTC offset in
+  seconds as a zig-zag varint.
+
+Type codes are shared with :mod:`fred.binary`, but there is no string table
+and objects are sorted, so canonical bytes are not valid binary documents.
+"""
+import hashlib
+from typing import Callable, Any
+
+from .binary import _make_encoder
+
+MAGIC = b"FRC\x01"
+CHUNK_SIZE = 64 * 1024
+
+
+def dumps(obj, default: Callable[[Any], Any] = None) -> bytes:
+    """
+    Return the canonical encoding of obj.
+
+    Args:
+        obj:
+            A FRED-serializable object.
+        default:
+            Called with objects that cannot be otherwise serialized. It should
+            return a serializable version of the object or raise TypeError.
+    """
+    chunks = []
+    write(obj, chunks.append, default)
+    return b"".join(chunks)
+
+
+def hash(obj, algorithm="sha256", default: Callable[[Any], Any] = None) -> str:
+    """
+    Return the hex digest of the canonical encoding of obj.
+
+    The encoding is streamed to the hash function in chunks and never built
+    in memory.
+
+    Args:
+        obj:
+            A FRED-serializable object.
+        algorithm:
+            Name of a hash algorithm supported by :func:`hashlib.new`.
+        default:
+            See :func:`dumps`.
+    """
+    hasher = hashlib.new(algorithm)
+    write(obj, hasher.update, default)
+    return hasher.hexdigest()
+
+
+def write(obj, sink: Callable[[bytes], Any], default=None, chunk_size=CHUNK_SIZE):
+    """
+    Pass the canonical encoding of obj to sink in chunks of about chunk_size
+    bytes.
+    """
+    out = bytearray(MAGIC)
+
+    def flush():
+        sink(bytes(out))
+        out.clear()
+
+    _make_encoder(out, default, canonical=True, flush=flush, chunk_size=chunk_size)(obj)
+    if out:
+        sink(bytes(out))
@@ -0,0 +1,141 @@
+"""
+Decode arrays of flat records into columns of NumPy arrays.
+
+NumPy is an optional dependency and it is only imported when columns are
+created.
+"""
+from datetime import date, datetime
+from typing import NamedTuple, Sequence, Union, Dict, Any
+
+from .decoder import FREDDecoder
+from .types import Symbol, Tag
+
+Path = Sequence[Union[str, int]]
+
+
+class Categorical(NamedTuple):
+    """
+    Column of strings or symbols stored as integer codes into an array of
+    unique values.
+    """
+
+    codes: Any
+    categories: Any
+
+
+class _Pairs(list):
+    """Objects decoded as lists of (key, value) pairs"""
+
+
+def loads_columns(src, path: Path = (), categories=False, **kwargs) -> Dict[str, Any]:
+    """
+    Load an array of records from FRED source and return a mapping from
+    field names to NumPy arrays.
+
+    Records are never decoded into dicts. Columns of integers, floats and
+    booleans become typed arrays, with missing values of numeric columns
+    stored as NaN. Dates and naive datetimes become datetime64 arrays. Other
+    columns, including fields missing from some records, become object arrays.
+
+    Args:
+        src:
+            FRED source (str or bytes).
+        path:
+            Sequence of keys and indexes that locate the array of records
+            inside the document. Tagged values are replaced by their values
+            along the path.
+        categories:
+            If True, columns of strings or symbols are returned as
+            :class:`Categorical` instances.
+        kwargs:
+            Additional arguments passed to the decoder.
+    """
+    from . import loads
+
+    data = loads(src, cls=FREDDecoder, object_pairs_hook=_Pairs, attr_hook=dict, **kwargs)
+    for step in path:
+        if isinstance(data, Tag):
+            data = data.value
+        if isinstance(data, _Pairs):
+            data = dict(data)
+        data = data[step]
+    if isinstance(data, Tag):
+        data = data.value
+    if not isinstance(data, list) or isinstance(data, _Pairs):
+        raise TypeError("path must point to an array of records")
+
+    columns = {}
+    for row, record in enumerate(data):
+        if not isinstance(record, _Pairs):
+            raise TypeError(f"record {row} is not an object")
+        for key, value in record:
+            try:
+                column = columns[key]
+            except KeyError:
+                column = columns[key] = [None] * row
+            if len(column) > row:
+                # Repeated keys: the last value wins, as in dicts
+                column[row] = value
+            else:
+                column.append(value)
+        size = row + 1
+        for column in columns.values():
+            if len(column) < size:
+                column.append(None)
+
+    return {key: make_column(values, categories) for key, values in columns.items()}
+
+
+def make_column(values: list, categories=False):
+    """
+    Create a NumPy array from a list of values of the same type.
+    """
+    import numpy as np
+
+    types = set(map(type, values))
+    has_none = type(None) in types
+    types.discard(type(None))
+
+    if types <= {int, float} and types:
+        if has_none or float in types:
+            return np.array([np.nan if x is None else x for x in values], dtype=np.float64)
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            pass
+    elif types == {bool} and not has_none:
+        return np.array(values, dtype=bool)
+    elif types == {datetime} and all(x is None or x.tzinfo is None for x in values):
+        return np.array(values, dtype="datetime64[us]")
+    elif types == {date}:
+        return np.array(values, dtype="datetime64[D]")
+    elif categories and types in ({str}, {Symbol}):
+        uniques = {}
+        codes = np.fromiter(
+            (-1 if x is None else uniques.setdefault(x, len(uniques)) for x in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return Categorical(codes, _object_array(list(uniques)))
+
+    return _object_array([_restore(x) for x in values])
+
+
+def _object_array(values):
+    import numpy as np
+
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _restore(value):
+    # Convert nested objects decoded as pairs back to dicts
+    if isinstance(value, _Pairs):
+        return {k: _restore(v) for k, v in value}
+    elif isinstance(value, list):
+        return [_restore(x) for x in value]
+    elif isinstance(value, Tag):
+        tag, attrs, inner = value.split()
+        return Tag.new(tag, attrs, _restore(inner))
+    return value
@@ -1,9 +1,15 @@
+import re
+from collections.abc import Collection, Mapping
 from datetime import datetime, date, time
-from typing import Union
+from enum import Enum
+from json import JSONDecoder
+from typing import Union, Callable
 
 from lark import InlineTransformer, UnexpectedToken
 
+from .arrays import array_tag_hook
 from .exceptions import FREDDecodeError
+from .hashcons import HashCons
 from . import parser
 from .parser import (
     parse_string,
@@ -14,11 +20,69 @@ from .parser import (
     parse_datetime_tz,
     fred_grammar,
 )
-from .types import Tag, Symbol
+from .types import Tag, FrozenTag, FrozenDict, Symbol
 
 FREDTypes = Tag, list, dict, type(None), bool, float, int, str, Symbol, datetime, date, time
 FRED = Union[Tag, list, dict, None, bool, float, int, str, Symbol, datetime, date, time]
 
+# JSON documents with those characters are either rejected by FRED or decoded
+# differently: raw C1 control characters and lone surrogate escapes
+JSON_UNSAFE = re.compile(r"[\x7f-\x9f]|\\u[dD][89a-fA-F]")
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not valid FRED")
+
+
+def tag_types_hook(types, tag_hook: Callable = None) -> Callable:
+    """
+    Return a tag hook that builds instances of the classes registered in
+    types by tag name and handles other tags with tag_hook.
+
+    types is a mapping from tag names to classes or an iterable of classes
+    registered under their names. Objects are passed as keyword arguments,
+    lists as positional arguments (collections receive the list itself) and
+    other values as a single argument. Attributes also become keyword
+    arguments. Dashes in the names of attributes and object keys are
+    replaced by underscores. Enums are looked up by symbol name.
+    """
+    tag_hook = tag_hook or Tag.new
+    if not isinstance(types, Mapping):
+        types = {cls.__name__: cls for cls in types}
+    builders = {tag: _tag_builder(cls) for tag, cls in types.items()}
+
+    def hook(tag, attrs, value):
+        try:
+            build = builders[tag]
+        except KeyError:
+            return tag_hook(tag, attrs, value)
+        return build(attrs, value)
+
+    return hook
+
+
+def _tag_builder(cls):
+    if isinstance(cls, type) and issubclass(cls, Enum):
+        return lambda attrs, value: cls[str(value)] if isinstance(value, Symbol) else cls(value)
+
+    is_collection = isinstance(cls, type) and issubclass(cls, Collection) and not hasattr(cls, "_fields")
+
+    def build(attrs, value):
+        kwargs = _keywords(attrs) if attrs else {}
+        if isinstance(value, dict):
+            return cls(**_keywords(value), **kwargs)
+        elif isinstance(value, (list, tuple)) and not is_collection:
+            return cls(*value, **kwargs)
+        elif value is None and kwargs:
+            return cls(**kwargs)
+        return cls(value, **kwargs)
+
+    return build
+
+
+def _keywords(mapping):
+    return {k.replace("-", "_"): v for k, v in mapping.items()}
+
 
 class FREDDecoder(object):
     """Simple JSON <http://json.org> decoder
@@ -56,6 +120,12 @@ class FREDDecoder(object):
     tag_hook = None
     parse_float = None
     parse_int = None
+    use_json = False
+    typed_arrays = None
+    tag_types = None
+    compact_tags = False
+    frozen = False
+    hash_cons = None
 
     def __init__(self, **kwargs):
         """``object_hook``, if specified, will be called with the result
@@ -79,6 +149,33 @@ class FREDDecoder(object):
         of every JSON int to be decoded. By default this is equivalent to
         int(num_str). This can be used to use another datatype or parser
         for JSON integers (e.g. float).
+
+        ``typed_arrays``, if given, decodes lists of numbers tagged with their
+        element types, e.g., ``f64 [1.0 2.0]`` or ``i32 [1 2]``, as compact
+        arrays. It can be "array", for array.array objects, or "numpy".
+
+        ``tag_types``, if given, maps tag names to classes (or is a list of
+        classes named after their tags). Tagged values are directly converted
+        to instances of those classes, see :func:`tag_types_hook`.
+
+        ``compact_tags``, if true, creates tags with :meth:`Tag.compact`,
+        which interns tag names and shares a single empty mapping among tags
+        without attributes. It is ignored if ``tag_hook`` is given.
+
+        ``frozen``, if true, decodes arrays as tuples, objects and attributes
+        as :class:`FrozenDict` and tags as :class:`FrozenTag`, producing
+        hashable trees. Explicit hooks take precedence.
+
+        ``hash_cons``, if true, decodes frozen trees in which structurally
+        identical subtrees are a single shared object. It can be a
+        :class:`fred.hashcons.HashCons` instance, which may be shared by
+        several decoders, or True to create one. The table is available as
+        the ``hash_cons`` attribute and reports the deduplication ratio.
+
+        ``use_json``, if true, first tries to decode documents with the C
+        accelerated JSON scanner and uses the FRED parser only if the source
+        is not valid JSON. It has no effect if ``array_hook`` or ``frozen``
+        is given.
         """
 
         for k, v in kwargs.items():
@@ -93,19 +190,60 @@ class FREDDecoder(object):
         else:
             object_pairs_hook = self.object_pairs_hook
 
+        array_hook = self.array_hook
+        tag_cls = Tag
+        if self.hash_cons:
+            if self.hash_cons is True:
+                self.hash_cons = HashCons()
+            object_pairs_hook = object_pairs_hook or self.hash_cons.dict
+            array_hook = array_hook or self.hash_cons.tuple
+            tag_cls = FrozenTag
+        elif self.frozen:
+            object_pairs_hook = object_pairs_hook or FrozenDict
+            array_hook = array_hook or tuple
+            tag_cls = FrozenTag
+
+        tag_hook = self.tag_hook
+        if tag_hook is None:
+            tag_hook = tag_cls.compact if self.compact_tags else tag_cls.new
+            if self.hash_cons:
+                tag_hook = self.hash_cons.tag_hook(tag_hook)
+        if self.tag_types:
+            tag_hook = tag_types_hook(self.tag_types, tag_hook)
+        if self.typed_arrays:
+            kind = "array" if self.typed_arrays is True else self.typed_arrays
+            tag_hook = array_tag_hook(kind, tag_hook)
+
         self.transformer = FREDTransformer(
             object_hook=object_pairs_hook,
-            array_hook=self.array_hook,
+            array_hook=array_hook,
             attr_hook=self.attr_hook,
+            tag_hook=tag_hook,
             parse_int=self.parse_int,
             parse_float=self.parse_float,
         )
 
+        if self.use_json and array_hook is None:
+            self._json_decode = JSONDecoder(
+                object_pairs_hook=object_pairs_hook,
+                parse_float=self.parse_float,
+                parse_int=self.parse_int,
+                parse_constant=_reject_constant,
+            ).decode
+        else:
+            self._json_decode = None
+
     def decode(self, src: str):
         """
         Return the Python representation of FRED source.
 
         """
+        if self._json_decode is not None and not JSON_UNSAFE.search(src):
+            try:
+                return self._json_decode(src)
+            except ValueError:
+                pass
+
         try:
             ast = fred_grammar.parse(src)
             return self.transformer.transform(ast)
@@ -143,8 +281,8 @@ class FREDTransformer(InlineTransformer):
     nan = cte(float("nan"))
 
     # Numbers
-    int = int
-    float = float
+    int = lambda self, x: self._parse_int(x)
+    float = lambda self, x: self._parse_float(x)
     bin = fn(lambda x: int(x, 2))
     oct = fn(lambda x: int(x, 8))
     hex = fn(lambda x: int(x, 16))
@@ -1,19 +1,34 @@
+from array import array
+from collections.abc import Iterator as _Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import is_dataclass, fields
 from datetime import date, time, datetime
-from functools import singledispatch
+from decimal import Decimal
+from enum import Enum
+from functools import singledispatch, lru_cache
 from itertools import chain
+from json import JSONEncoder
 from json.encoder import py_encode_basestring_ascii as encode_string
-from typing import Dict
+from operator import attrgetter
+from typing import Dict, Callable, Any, Optional, Iterable, Iterator
+from uuid import UUID
 
 import re
+import sys
 
+from .arrays import ARRAY_TAGS
 from .parser import TERMINALS
-from .types import Symbol, Tag
+from .pretty import Begin, Break, END, pretty
+from .types import Symbol, Tag, FrozenTag
 
 #
 # Regular expressions and other auxiliary constants
 #
 FRED_NAME = re.compile(TERMINALS["NAME"])
 is_fred_name = FRED_NAME.fullmatch
+CHUNK_SIZE = 64 * 1024
+KEY_CACHE_SIZE = 4096
+SHAPE_CACHE_SIZE = 256
 
 # Construct
 ESCAPE_BYTE_STRING: Dict[int, str] = {
@@ -51,6 +66,39 @@ def encode_symbol(symb, _is_name=is_fred_name, _encode=encode_string, _str=str):
         return f"${_encode(symb)}"
 
 
+_ESCAPE_UTF8 = re.compile(r'[\x00-\x1f\x7f-\x9f"\\\ud800-\udfff]')
+_ESCAPE_UTF8_DCT = {
+    **{chr(i): "\\u{0:04x}".format(i) for i in (*range(0x20), *range(0x7F, 0xA0))},
+    '"': '\\"',
+    "\\": "\\\\",
+    "\b": "\\b",
+    "\f": "\\f",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+}
+
+
+def encode_string_utf8(st, _sub=_ESCAPE_UTF8.sub):
+    """
+    Return a FRED representation of a Python string that keeps non-ASCII
+    characters. Control characters and lone surrogates are escaped.
+    """
+
+    def replace(m, _escape=_ESCAPE_UTF8_DCT):
+        char = m.group(0)
+        try:
+            return _escape[char]
+        except KeyError:
+            return "\\u{0:04x}".format(ord(char))
+
+    return f'"{_sub(replace, st)}"'
+
+
+def encode_symbol_utf8(symb):
+    return encode_symbol(symb, _encode=encode_string_utf8)
+
+
 # Polymorphic encoders
 class _EncodeError(Exception):
     """Private exception that tells encode_atom and encode_key have failed"""
@@ -93,6 +141,231 @@ encode_simple(bytes, encode_byte_string)
 encode_simple(Symbol, encode_symbol)
 
 
+def encode_key_utf8(obj):
+    return encode_key(obj, _encode=encode_string_utf8)
+
+
+def encode_atom_utf8(obj):
+    """
+    Like encode_atom, but keep non-ASCII characters in strings and symbols.
+    """
+    fn = encode_atom.dispatch(type(obj))
+    return UTF8_ENCODERS.get(fn, fn)(obj)
+
+
+def atom_encoders(ensure_ascii=True) -> Dict[type, Callable[[Any], str]]:
+    """
+    Return a mapping from types to functions that encode their instances
+    as FRED atoms.
+    """
+    atoms = {cls: fn for cls, fn in encode_atom.registry.items() if cls is not object}
+    if not ensure_ascii:
+        atoms = {cls: UTF8_ENCODERS.get(fn, fn) for cls, fn in atoms.items()}
+    return atoms
+
+
+UTF8_ENCODERS = {encode_string: encode_string_utf8, encode_symbol: encode_symbol_utf8}
+
+
+class Literal(str):
+    """
+    A string that is written verbatim in the FRED output.
+
+    Type encoders may return literals to emit representations that do not
+    correspond to any Python value, e.g., numbers with arbitrary precision.
+    """
+
+
+encode_simple(Literal, str.__str__)
+
+
+#
+# Encoders for other Python types
+#
+TypeEncoder = Callable[[Any], Any]
+
+
+def encode_decimal(obj: Decimal) -> Literal:
+    """
+    Encode decimal as a FRED number literal with no loss of precision.
+    """
+    if obj.is_finite():
+        return Literal(obj)
+    elif obj.is_nan():
+        return Literal("nan")
+    return Literal("-inf" if obj.is_signed() else "inf")
+
+
+def encode_array(obj: array):
+    """
+    Encode numeric arrays as typed array tags, e.g., f64 [1.0 2.0].
+    """
+    try:
+        tag = ARRAY_TAGS[obj.typecode]
+    except KeyError:
+        return obj.tolist()
+    fmt = float.__repr__ if tag[0] == "f" else int.__repr__
+    return Tag.new(tag, {}, Literal("[" + " ".join(map(fmt, obj)) + "]"))
+
+
+def numpy_type_encoder(cls: type) -> Optional[TypeEncoder]:
+    """
+    Return a converter for NumPy scalars and arrays or None.
+
+    NumPy is never imported here: if it was not imported by the application,
+    cls cannot be a NumPy type.
+    """
+    np = sys.modules.get("numpy")
+    if np is None:
+        return None
+    elif issubclass(cls, np.ndarray):
+        return encode_ndarray
+    elif issubclass(cls, np.datetime64):
+        return lambda obj: obj.astype(_datetime64_unit(obj.dtype)).item()
+    elif issubclass(cls, np.generic):
+        return cls.item
+    return None
+
+
+def encode_ndarray(obj):
+    """
+    Encode NumPy arrays as (nested) lists. Numbers and booleans are formatted
+    in bulk into a literal.
+    """
+    if obj.ndim == 0:
+        return obj[()]
+
+    kind = obj.dtype.kind
+    if kind == "f":
+        fmt = float.__repr__
+    elif kind in "iu":
+        fmt = int.__repr__
+    elif kind == "b":
+        fmt = {True: "true", False: "false"}.__getitem__
+    elif kind == "M":
+        return obj.astype(_datetime64_unit(obj.dtype)).tolist()
+    else:
+        return obj.tolist()
+
+    def format_array(arr):
+        if arr.ndim == 1:
+            return "[" + " ".join(map(fmt, arr.tolist())) + "]"
+        return "[" + " ".join(map(format_array, arr)) + "]"
+
+    return Literal(format_array(obj))
+
+
+def _datetime64_unit(dtype):
+    # Units up to days are converted to dates and other to datetimes
+    import numpy as np
+
+    unit, _ = np.datetime_data(dtype)
+    return "datetime64[D]" if unit in ("Y", "M", "W", "D") else "datetime64[us]"
+
+
+class RecordEncoder:
+    """
+    Type encoder for dataclasses and named tuples.
+
+    Called with an instance, it returns the fields as a dict, wrapped into a
+    tag if tag is given. The encoders use :meth:`items` instead, to write the
+    fields without building the dict.
+    """
+    __slots__ = ("names", "values", "tag", "_layouts")
+
+    def __init__(self, names: tuple, values: Callable[[Any], tuple], tag: str = None):
+        self.names = names
+        self.values = values
+        self.tag = tag
+        self._layouts = {}
+
+    def __call__(self, obj):
+        data = dict(zip(self.names, self.values(obj)))
+        return data if self.tag is None else Tag.new(self.tag, {}, data)
+
+    def items(self, obj, encode_key, sep, sort_keys):
+        """
+        Return pairs of encoded keys followed by sep and field values in
+        output order.
+        """
+        try:
+            texts, order = self._layouts[encode_key, sep, sort_keys]
+        except KeyError:
+            names = self.names
+            order = sorted(range(len(names)), key=names.__getitem__) if sort_keys else None
+            texts = [encode_key(names[i]) + sep for i in order or range(len(names))]
+            self._layouts[encode_key, sep, sort_keys] = texts, order
+
+        values = self.values(obj)
+        if order is not None:
+            values = [values[i] for i in order]
+        return zip(texts, values)
+
+
+def make_type_encoder(cls: type, tag_types=False) -> Optional[TypeEncoder]:
+    """
+    Return a function that converts instances of cls to FRED-serializable
+    values or None, if cls is not supported.
+
+    Handles dataclasses, named tuples, enums, decimals, UUIDs, sets, arrays
+    and NumPy values. If tag_types is True, values are wrapped into tags
+    named after their classes, except for arrays and NumPy values.
+    """
+    if is_dataclass(cls):
+        names = tuple(f.name for f in fields(cls))
+        if len(names) == 1:
+            name, = names
+            values = lambda obj: (getattr(obj, name),)
+        elif names:
+            values = attrgetter(*names)
+        else:
+            values = lambda obj: ()
+        return RecordEncoder(names, values, cls.__name__ if tag_types else None)
+    elif issubclass(cls, tuple) and hasattr(cls, "_fields"):
+        if not tag_types:
+            # Encoded as arrays, like other tuples
+            return None
+        return RecordEncoder(tuple(cls._fields), tuple, cls.__name__)
+    elif issubclass(cls, Enum):
+        if tag_types:
+            name = cls.__name__
+            return lambda obj: Tag.new(name, {}, Symbol(obj.name))
+        return attrgetter("value")
+    elif issubclass(cls, Decimal):
+        fn = str if tag_types else encode_decimal
+    elif issubclass(cls, UUID):
+        fn = str
+    elif issubclass(cls, (set, frozenset)):
+        fn = list
+    elif issubclass(cls, array):
+        return encode_array
+    else:
+        return numpy_type_encoder(cls)
+
+    if tag_types:
+        name = cls.__name__
+        return lambda obj: Tag.new(name, {}, fn(obj))
+    return fn
+
+
+def coalesce(chunks: Iterable[str], size: int) -> Iterator[str]:
+    """
+    Join consecutive strings into chunks of at least the given size.
+    """
+    buf = []
+    append = buf.append
+    buf_size = 0
+    for chunk in chunks:
+        append(chunk)
+        buf_size += len(chunk)
+        if buf_size >= size:
+            yield "".join(buf)
+            buf.clear()
+            buf_size = 0
+    if buf:
+        yield "".join(buf)
+
+
 class FREDEncoder(object):
     """Extensible FRED <http://fred-format.org> encoder for Python data
     structures. The API is modelled after the builtin json.JSONEncoder.
@@ -127,10 +400,16 @@ class FREDEncoder(object):
     | None              | null           |
     +-------------------+----------------+
 
-    To extend this to recognize other objects, subclass and implement a
-    ``.default()`` method with another method that returns a serializable
-    object for ``o`` if possible, otherwise it should call the superclass
-    implementation (to raise ``TypeError``).
+    Dataclasses are encoded as objects, enums are encoded as their values,
+    named tuples, sets, iterators and generators as arrays, decimals as
+    numbers and UUIDs as strings.
+
+    To extend this to recognize other objects, pass a mapping from types to
+    functions that convert their instances to serializable objects in the
+    ``types`` argument or call the ``.register()`` method. Alternatively,
+    subclass and implement a ``.default()`` method with another method that
+    returns a serializable object for ``o`` if possible, otherwise it should
+    call the superclass implementation (to raise ``TypeError``).
 
     """
 
@@ -149,6 +428,11 @@ class FREDEncoder(object):
             indent=None,
             separators=None,
             default=None,
+            types=None,
+            tag_types=False,
+            use_json=False,
+            iter_types=(_Iterator,),
+            width=None,
             **kwargs,
     ):
         """Constructor for JSONEncoder, with sensible defaults.
@@ -189,6 +473,31 @@ class FREDEncoder(object):
         that can't otherwise be serialized.  It should return a JSON encodable
         version of the object or raise a ``TypeError``.
 
+        If specified, types is a mapping from types to functions that convert
+        their instances (including subclasses) to JSON encodable objects.
+        Those functions are tried before default and take precedence over the
+        builtin support for dataclasses, named tuples, enums, etc.
+
+        If tag_types is true, dataclasses, named tuples, enums, decimals, UUIDs
+        and sets are encoded as tagged values named after their classes.
+        Named tuples are then written as objects instead of arrays.
+
+        If specified, iter_types is a tuple of types whose instances are
+        consumed and encoded as arrays. The default accepts any iterator,
+        including generators, which are written lazily by iterencode.
+
+        If width is given, output is laid out in lines of at most width
+        characters when possible. Items of arrays fill lines, while objects
+        are written either in a single line or with one field per line. Nested
+        blocks are indented by indent spaces (2 by default).
+
+        If use_json is true, lists and dicts that contain only strings,
+        numbers, booleans, None and other such containers are written by the
+        C accelerated json encoder. The output is valid FRED, but keys of
+        those objects are always quoted. It has no effect if ensure_ascii is
+        false, since json escapes a different set of characters than FRED, or
+        if indent is given, since json lays out indented output differently.
+
         """
         if list(kwargs) == ['skipkeys']:
             raise TypeError('FREDEncoder uses skip_keys (mind the underscore)')
@@ -207,6 +516,44 @@ class FREDEncoder(object):
         elif indent is not None:
             self.item_separator = ""
         self._default = default or self.default
+        self.types = dict(types or ())
+        self.tag_types = tag_types
+        self.use_json = use_json
+        self.iter_types = tuple(iter_types)
+        self.width = width
+        self._type_encoders = {}
+
+    def register(self, cls: type, fn: TypeEncoder):
+        """
+        Register a function that converts instances of cls to FRED-serializable
+        objects.
+        """
+        self.types[cls] = fn
+        self._type_encoders.clear()
+
+    def type_encoder(self, cls: type) -> Optional[TypeEncoder]:
+        """
+        Return the function registered to convert instances of cls to
+        FRED-serializable objects or None.
+        """
+        try:
+            return self._type_encoders[cls]
+        except KeyError:
+            pass
+
+        types = self.types
+        for base in cls.__mro__:
+            if base in types:
+                fn = types[base]
+                break
+        else:
+            fn = make_type_encoder(cls, self.tag_types)
+        self._type_encoders[cls] = fn
+        return fn
+
+    def _use_json(self) -> bool:
+        # The json module would bypass converters registered for containers
+        return self.use_json and not any(map(self.type_encoder, (list, tuple, dict)))
 
     def default(self, obj):
         """Implement this method in a subclass such that it returns
@@ -236,9 +583,25 @@ class FREDEncoder(object):
         >>> FREDEncoder().encode({"foo": ["bar", "baz"]})
         '{foo: ["bar" "baz"]}'
         """
-        return "".join(self.iterencode(obj, _one_shot=True))
+        if self.width is not None:
+            return "".join(self.iterencode(obj))
 
-    def iterencode(self, obj, _one_shot=False):
+        encode = _make_encode(
+            {} if self.check_circular else None,
+            self._default,
+            self.indent,
+            self.key_separator,
+            self.item_separator,
+            self.sort_keys,
+            self.skip_keys,
+            self.ensure_ascii,
+            self.type_encoder,
+            self._use_json(),
+            self.iter_types,
+        )
+        return encode(obj)
+
+    def iterencode(self, obj, _one_shot=False, chunk_size=None):
         """
         Encode the given object and yield each string representation as available.
 
@@ -246,7 +609,28 @@ class FREDEncoder(object):
 
             for chunk in FREDEncoder().iterencode(bigobject):
                 mysocket.write(chunk)
+
+        If chunk_size is given, small pieces of output are coalesced into
+        chunks of at least chunk_size characters (except for the last one).
         """
+        if chunk_size is not None:
+            return coalesce(self.iterencode(obj, _one_shot), chunk_size)
+
+        if self.width is not None:
+            layout = _make_iterlayout(
+                {} if self.check_circular else None,
+                self._default,
+                self.indent,
+                self.key_separator,
+                self.item_separator,
+                self.sort_keys,
+                self.skip_keys,
+                self.ensure_ascii,
+                self.type_encoder,
+                self.iter_types,
+            )
+            return pretty(layout(obj), self.width)
+
         _iterencode = _make_iterencode(
             {} if self.check_circular else None,
             self._default,
@@ -255,11 +639,142 @@ class FREDEncoder(object):
             self.item_separator,
             self.sort_keys,
             self.skip_keys,
+            self.ensure_ascii,
+            self.type_encoder,
+            self._use_json(),
+            self.iter_types,
             _one_shot,
         )
         return _iterencode(obj, 0)
 
 
+def iterencode_parallel(obj, workers: int, slice_size=1024, **kwargs) -> Iterator[str]:
+    """
+    Encode obj using a pool of processes and yield the resulting chunks.
+
+    Top-level lists and tuples, possibly wrapped in a tag, are split into
+    slices of ``slice_size`` items encoded by separate processes with
+    FREDEncoder(**kwargs). The result is identical to the serial encoder's,
+    but arguments such as default and types must be picklable. Other values
+    and output laid out by width, which depends on the surrounding items, are
+    encoded serially.
+    """
+    encoder = FREDEncoder(**kwargs)
+    prefix = ""
+    items = obj
+    if isinstance(obj, Tag):
+        tag, attrs, items = obj.split()
+        if type(items) in (list, tuple):
+            prefix = encoder.encode(Tag.new(tag, attrs, []))[:-2]
+
+    if (
+            type(items) not in (list, tuple)
+            or len(items) <= slice_size
+            or workers <= 1
+            or encoder.width is not None
+    ):
+        yield encoder.encode(obj)
+        return
+
+    left, separator, right = _list_delimiters(encoder)
+    yield prefix + left
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(kwargs,)) as pool:
+        slices = (items[i:i + slice_size] for i in range(0, len(items), slice_size))
+        for i, data in enumerate(pool.map(_encode_worker_slice, slices)):
+            if i:
+                yield separator
+            yield data
+    yield right
+
+
+def _list_delimiters(encoder):
+    # The opening, separator and closing strings of top-level lists
+    left, _, right = encoder.encode([0]).partition("0")
+    separator = encoder.encode([0, 0])[len(left) + 1:-len(right) - 1]
+    return left, separator, right
+
+
+_worker_encoder = None
+
+
+def _init_worker(kwargs):
+    global _worker_encoder
+    encoder = FREDEncoder(**kwargs)
+    _worker_encoder = encoder, _list_delimiters(encoder)
+
+
+def _encode_worker_slice(items):
+    encoder, (left, _, right) = _worker_encoder
+    return encoder.encode(list(items))[len(left):-len(right)]
+
+
+def _make_json_encode(
+        markers,
+        _key_separator,
+        _item_separator,
+        _sort_keys,
+        dict=dict,
+        type=type,
+        json_atoms=frozenset([str, int, float, bool, type(None)]),
+        json_sequences=frozenset([list, tuple]),
+):
+    """
+    Return a function that encodes lists and dicts made only of JSON types
+    with the C accelerated json encoder or return None for other values.
+
+    Only exact types are accepted: subclasses of str, dict, etc. may be
+    Symbols, literals, named tuples or registered types.
+    """
+    json_encode = JSONEncoder(
+        ensure_ascii=True,
+        check_circular=markers is not None,
+        allow_nan=False,
+        sort_keys=_sort_keys,
+        separators=(_item_separator, _key_separator),
+    ).encode
+
+    def is_json(obj):
+        if type(obj) is dict:
+            for k in obj:
+                if type(k) is not str:
+                    return False
+            obj = obj.values()
+        for v in obj:
+            cls = type(v)
+            if cls not in json_atoms and not (
+                    (cls is dict or cls in json_sequences) and is_json(v)
+            ):
+                return False
+        return True
+
+    def encode_json(obj):
+        cls = type(obj)
+        if cls is not dict and cls not in json_sequences:
+            return None
+        try:
+            if not is_json(obj):
+                return None
+            data = json_encode(obj)
+        except (TypeError, ValueError, RecursionError):
+            # NaN, infinities, keys that cannot be sorted and circular
+            # references are handled by the regular encoder
+            return None
+        return data
+
+    return encode_json
+
+
+def _cached_keys(encode_key):
+    # Keys repeat a lot: cache the representations of strings. Other keys
+    # may be equal but encoded differently, e.g., 0.0 and -0.0.
+    cached = lru_cache(KEY_CACHE_SIZE)(encode_key)
+    return lambda obj: cached(obj) if type(obj) is str else encode_key(obj)
+
+
+_ascii_encoders = (encode_atom, _cached_keys(encode_key), encode_string)
+_utf8_encoders = (encode_atom_utf8, _cached_keys(encode_key_utf8), encode_string_utf8)
+
+
 def _make_iterencode(
         markers,
         _default,
@@ -268,16 +783,29 @@ def _make_iterencode(
         _item_separator,
         _sort_keys,
         _skipkeys,
+        _ensure_ascii,
+        _type_encoder,
+        _use_json,
+        _iter_types,
         _one_shot,
         _EncodeError=_EncodeError,
         dict=dict,
         id=id,
         sequence=(list, tuple),
-        encode_atom=encode_atom,
 ):
     if _indent is not None and not isinstance(_indent, str):
         _indent = " " * _indent
 
+    if _ensure_ascii:
+        encode_atom, encode_key, encode_string = _ascii_encoders
+    else:
+        encode_atom, encode_key, encode_string = _utf8_encoders
+
+    if _use_json and _ensure_ascii and _indent is None:
+        encode_json = _make_json_encode(markers, _key_separator, _item_separator, _sort_keys)
+    else:
+        encode_json = None
+
     def encode_list(lst, _current_indent_level):
         if not lst:
             yield "[]"
@@ -326,11 +854,40 @@ def _make_iterencode(
             yield empty
             return
 
+        if _sort_keys:
+            items = sorted(dic.items(), key=lambda kv: kv[0])
+        else:
+            items = dic.items()
+        yield from encode_items(dic, encode_keys(items, sep), _current_indent_level, left, right)
+
+    def encode_keys(items, sep):
+        for key, value in items:
+            try:
+                yield encode_key(key) + sep, value
+            except _EncodeError:
+                if _skipkeys:
+                    continue
+                cls = type(key).__name__
+                msg = f"keys must be str, int, float, bool or None, not {cls}"
+                raise TypeError(msg)
+
+    def encode_record(obj, record, _current_indent_level, is_name=FRED_NAME.fullmatch):
+        if record.tag is not None:
+            tag = record.tag
+            yield (tag if is_name(tag) else f'\\{encode_string(tag)}') + " "
+        if not record.names:
+            yield "{}"
+            return
+        items = record.items(obj, encode_key, _key_separator, _sort_keys)
+        yield from encode_items(obj, items, _current_indent_level, "{", "}")
+
+    def encode_items(obj, items, _current_indent_level, left, right):
+        # Yield pairs of encoded keys with separators and values
         if markers is not None:
-            marker_id = id(dic)
+            marker_id = id(obj)
             if marker_id in markers:
                 raise ValueError("Circular reference detected")
-            markers[marker_id] = dic
+            markers[marker_id] = obj
 
         yield left
         if _indent is not None:
@@ -343,27 +900,12 @@ def _make_iterencode(
             item_separator = _item_separator
 
         first = True
-        if _sort_keys:
-            items = sorted(dic.items(), key=lambda kv: kv[0])
-        else:
-            items = dic.items()
-
         for key, value in items:
-            try:
-                key = encode_key(key)
-            except _EncodeError:
-                if _skipkeys:
-                    continue
-                cls = type(key).__name__
-                msg = f"keys must be str, int, float, bool or None, not {cls}"
-                raise TypeError(msg)
-
             if first:
                 first = False
             else:
                 yield item_separator
             yield key
-            yield sep
 
             try:
                 yield encode_atom(value)
@@ -379,6 +921,15 @@ def _make_iterencode(
             # noinspection PyUnboundLocalVariable
             del markers[marker_id]
 
+    def encode_iter(it, _current_indent_level):
+        it = iter(it)
+        for first in it:
+            break
+        else:
+            yield "[]"
+            return
+        yield from encode_list(chain((first,), it), _current_indent_level)
+
     def encode_tag(tag_obj, _current_indent_level, is_name=FRED_NAME.fullmatch):
         tag, attrs, value = tag_obj.split()
         if not is_name(tag):
@@ -397,24 +948,42 @@ def _make_iterencode(
             yield from encode_value(value, _current_indent_level)
 
     def encode_container(obj, indent, isinstance=isinstance):
-        if isinstance(obj, sequence):
-            yield from encode_list(obj, indent)
-        elif isinstance(obj, dict):
-            yield from encode_dict(obj, indent)
-        elif isinstance(obj, Tag):
-            yield from encode_tag(obj, indent)
+        if encode_json is not None:
+            data = encode_json(obj)
+            if data is not None:
+                yield data
+                return
+
+        convert = _type_encoder(type(obj))
+        if convert is None:
+            if isinstance(obj, sequence):
+                yield from encode_list(obj, indent)
+                return
+            elif isinstance(obj, dict):
+                yield from encode_dict(obj, indent)
+                return
+            elif isinstance(obj, Tag):
+                yield from encode_tag(obj, indent)
+                return
+            elif isinstance(obj, _iter_types):
+                yield from encode_iter(obj, indent)
+                return
+            convert = _default
+        elif type(convert) is RecordEncoder:
+            yield from encode_record(obj, convert, indent)
+            return
+
+        if markers is not None:
+            marker_id = id(obj)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = obj
+            obj = convert(obj)
+            yield from encode_value(obj, indent)
+            del markers[marker_id]
         else:
-            if markers is not None:
-                marker_id = id(obj)
-                if marker_id in markers:
-                    raise ValueError("Circular reference detected")
-                markers[marker_id] = obj
-                obj = _default(obj)
-                yield from encode_value(obj, indent)
-                del markers[marker_id]
-            else:
-                obj = _default(obj)
-                yield from encode_value(obj, indent)
+            obj = convert(obj)
+            yield from encode_value(obj, indent)
 
     def encode_value(obj, indent):
         try:
@@ -423,3 +992,500 @@ def _make_iterencode(
             yield from encode_container(obj, indent)
 
     return encode_value
+
+
+def _make_encode(
+        markers,
+        _default,
+        _indent,
+        _key_separator,
+        _item_separator,
+        _sort_keys,
+        _skipkeys,
+        _ensure_ascii,
+        _type_encoder,
+        _use_json,
+        _iter_types,
+        _EncodeError=_EncodeError,
+        dict=dict,
+        id=id,
+        type=type,
+        isinstance=isinstance,
+        sequence=(list, tuple),
+):
+    """
+    Non-incremental version of _make_iterencode.
+
+    The returned function appends all chunks to a single list and dispatch
+    values by their exact types, resorting to encode_atom and isinstance checks
+    only for subclasses and unknown types. It must produce exactly the same
+    output as the incremental encoder.
+    """
+    if _indent is not None and not isinstance(_indent, str):
+        _indent = " " * _indent
+
+    if _ensure_ascii:
+        encode_atom, encode_key, encode_string = _ascii_encoders
+    else:
+        encode_atom, encode_key, encode_string = _utf8_encoders
+
+    if _use_json and _ensure_ascii and _indent is None:
+        encode_json = _make_json_encode(markers, _key_separator, _item_separator, _sort_keys)
+    else:
+        encode_json = None
+
+    parts = []
+    append = parts.append
+    get_atom = atom_encoders(_ensure_ascii).get
+
+    def encode_list(lst, _current_indent_level):
+        if not lst:
+            append("[]")
+            return
+
+        if markers is not None:
+            marker_id = id(lst)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = lst
+
+        if _indent is not None:
+            _current_indent_level += 1
+            newline_indent = "\n" + _indent * _current_indent_level
+            separator = _item_separator + newline_indent
+            append("[" + newline_indent)
+        else:
+            newline_indent = None
+            separator = _item_separator
+            append("[")
+
+        first = True
+        for value in lst:
+            if first:
+                first = False
+            else:
+                append(separator)
+
+            atom = get_atom(type(value))
+            if atom is not None:
+                append(atom(value))
+            else:
+                encode_value(value, _current_indent_level)
+
+        if newline_indent is not None:
+            append("\n" + _indent * (_current_indent_level - 1))
+        append("]")
+
+        if markers is not None:
+            del markers[marker_id]
+
+    def encode_dict(dic, _current_indent_level, empty="{}", left="{", right="}", sep=_key_separator):
+        if not dic:
+            append(empty)
+            return
+
+        # Dicts with the same keys share the encoded keys and their order
+        keys = tuple(dic)
+        cache = shapes[sep]
+        try:
+            texts, order = cache[keys]
+        except KeyError:
+            texts, order = shape(keys, sep, cache)
+        if order is None:
+            items = zip(texts, dic.values())
+        else:
+            items = zip(texts, map(dic.__getitem__, order))
+        encode_items(dic, items, _current_indent_level, left, right)
+
+    def encode_record(obj, record, _current_indent_level, is_name=FRED_NAME.fullmatch):
+        if record.tag is not None:
+            tag = record.tag
+            append((tag if is_name(tag) else f'\\{encode_string(tag)}') + " ")
+        if not record.names:
+            append("{}")
+            return
+        items = record.items(obj, encode_key, _key_separator, _sort_keys)
+        encode_items(obj, items, _current_indent_level, "{", "}")
+
+    def encode_items(obj, items, _current_indent_level, left, right):
+        # Write pairs of encoded keys with separators and values
+        if markers is not None:
+            marker_id = id(obj)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = obj
+
+        append(left)
+        if _indent is not None:
+            _current_indent_level += 1
+            newline_indent = "\n" + _indent * _current_indent_level
+            item_separator = _item_separator + newline_indent
+            append(newline_indent)
+        else:
+            newline_indent = None
+            item_separator = _item_separator
+
+        first = True
+        for key, value in items:
+            if first:
+                first = False
+            else:
+                append(item_separator)
+            append(key)
+
+            atom = get_atom(type(value))
+            if atom is not None:
+                append(atom(value))
+            else:
+                encode_value(value, _current_indent_level)
+
+        if newline_indent is not None:
+            append("\n" + _indent * (_current_indent_level - 1))
+        append(right)
+
+        if markers is not None:
+            del markers[marker_id]
+
+    def encode_iter(it, _current_indent_level):
+        it = iter(it)
+        for first in it:
+            break
+        else:
+            append("[]")
+            return
+        encode_list(chain((first,), it), _current_indent_level)
+
+    shapes = {_key_separator: {}, "=": {}}
+
+    def shape(keys, sep, cache):
+        """
+        Return the list of encoded keys followed by sep in output order and
+        the list of the corresponding keys, or None if the output order is
+        the same as the dict's.
+
+        Only shapes with string keys are cached, since equal keys of
+        different types, e.g., 1 and True, are encoded differently.
+        """
+        texts = []
+        order = []
+        for key in sorted(keys) if _sort_keys else keys:
+            try:
+                texts.append(encode_key(key) + sep)
+                order.append(key)
+            except _EncodeError:
+                if _skipkeys:
+                    continue
+                cls = type(key).__name__
+                msg = f"keys must be str, int, float, bool or None, not {cls}"
+                raise TypeError(msg)
+        if not _sort_keys and len(order) == len(keys):
+            order = None
+        for key in keys:
+            if type(key) is not str:
+                break
+        else:
+            if len(cache) >= SHAPE_CACHE_SIZE:
+                cache.clear()
+            cache[keys] = texts, order
+        return texts, order
+
+    def encode_tag(tag_obj, _current_indent_level, is_name=FRED_NAME.fullmatch):
+        tag, attrs, value = tag_obj.split()
+        if not is_name(tag):
+            tag = f'\\{encode_string(tag)}'
+
+        if value is None:
+            append(f'({tag}')
+            if attrs:
+                encode_dict(attrs, _current_indent_level + 1, left=' ', right='', sep='=')
+            append(')')
+        else:
+            append(tag)
+            if attrs:
+                encode_dict(attrs, _current_indent_level + 1, left=' (', right=')', sep='=')
+            append(' ')
+            encode_value(value, _current_indent_level)
+
+    containers = {
+        list: encode_list,
+        tuple: encode_list,
+        dict: encode_dict,
+        Tag: encode_tag,
+        FrozenTag: encode_tag,
+    }
+    # Registered converters take precedence, as in the incremental encoder
+    containers = {cls: fn for cls, fn in containers.items() if _type_encoder(cls) is None}
+    get_container = containers.get
+
+    def encode_value(obj, _current_indent_level):
+        cls = type(obj)
+        atom = get_atom(cls)
+        if atom is not None:
+            append(atom(obj))
+            return
+
+        container = get_container(cls)
+        if container is not None:
+            if encode_json is not None:
+                data = encode_json(obj)
+                if data is not None:
+                    append(data)
+                    return
+            container(obj, _current_indent_level)
+            return
+
+        # Subclasses of known types, registered types and objects handled by
+        # default()
+        try:
+            append(encode_atom(obj))
+            return
+        except _EncodeError:
+            pass
+
+        convert = _type_encoder(cls)
+        if convert is None:
+            if isinstance(obj, sequence):
+                encode_list(obj, _current_indent_level)
+                return
+            elif isinstance(obj, dict):
+                encode_dict(obj, _current_indent_level)
+                return
+            elif isinstance(obj, Tag):
+                encode_tag(obj, _current_indent_level)
+                return
+            elif isinstance(obj, _iter_types):
+                encode_iter(obj, _current_indent_level)
+                return
+            convert = _default
+        elif type(convert) is RecordEncoder:
+            encode_record(obj, convert, _current_indent_level)
+            return
+
+        if markers is not None:
+            marker_id = id(obj)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = obj
+            encode_value(convert(obj), _current_indent_level)
+            del markers[marker_id]
+        else:
+            encode_value(convert(obj), _current_indent_level)
+
+    def encode(obj):
+        encode_value(obj, 0)
+        return "".join(parts)
+
+    return encode
+
+
+def _make_iterlayout(
+        markers,
+        _default,
+        _indent,
+        _key_separator,
+        _item_separator,
+        _sort_keys,
+        _skipkeys,
+        _ensure_ascii,
+        _type_encoder,
+        _iter_types,
+        _EncodeError=_EncodeError,
+        dict=dict,
+        id=id,
+        sequence=(list, tuple),
+):
+    """
+    Version of _make_iterencode that yields a stream of pretty printer tokens
+    instead of strings. Lists use inconsistent breaks, so items fill the
+    available lines, and objects use consistent breaks, so they are either
+    written in a single line or with one field per line.
+    """
+    if _indent is None:
+        _indent = 2
+    elif isinstance(_indent, str):
+        _indent = len(_indent)
+
+    if _ensure_ascii:
+        encode_atom, encode_key, encode_string = _ascii_encoders
+    else:
+        encode_atom, encode_key, encode_string = _utf8_encoders
+
+    separator = _item_separator.rstrip(" ")
+    item_break = Break(max(len(_item_separator) - len(separator), 1))
+    open_break = Break(0)
+    close_break = Break(0, -_indent)
+    block = Begin(_indent, consistent=True)
+    fill = Begin(0)
+
+    def layout_list(lst):
+        if markers is not None:
+            marker_id = id(lst)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = lst
+
+        first = True
+        for value in lst:
+            if first:
+                first = False
+                yield block
+                yield "["
+                yield open_break
+                yield fill
+            else:
+                if separator:
+                    yield separator
+                yield item_break
+            try:
+                yield encode_atom(value)
+            except _EncodeError:
+                yield from layout_container(value)
+
+        if first:
+            yield "[]"
+        else:
+            yield END
+            yield close_break
+            yield "]"
+            yield END
+
+        if markers is not None:
+            del markers[marker_id]
+
+    def layout_dict(dic, sep=_key_separator):
+        if not dic:
+            yield "{}"
+            return
+
+        if markers is not None:
+            marker_id = id(dic)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = dic
+
+        yield block
+        yield "{"
+        yield open_break
+
+        first = True
+        if _sort_keys:
+            items = sorted(dic.items(), key=lambda kv: kv[0])
+        else:
+            items = dic.items()
+
+        for key, value in items:
+            try:
+                key = encode_key(key)
+            except _EncodeError:
+                if _skipkeys:
+                    continue
+                cls = type(key).__name__
+                msg = f"keys must be str, int, float, bool or None, not {cls}"
+                raise TypeError(msg)
+
+            if first:
+                first = False
+            else:
+                if separator:
+                    yield separator
+                yield item_break
+
+            try:
+                yield key + sep + encode_atom(value)
+            except _EncodeError:
+                yield key + sep
+                yield from layout_container(value)
+
+        yield close_break
+        yield "}"
+        yield END
+
+        if markers is not None:
+            del markers[marker_id]
+
+    def layout_attrs(attrs, leading_break):
+        if _sort_keys:
+            items = sorted(attrs.items(), key=lambda kv: kv[0])
+        else:
+            items = attrs.items()
+
+        first = True
+        for key, value in items:
+            try:
+                key = encode_key(key)
+            except _EncodeError:
+                if _skipkeys:
+                    continue
+                cls = type(key).__name__
+                msg = f"keys must be str, int, float, bool or None, not {cls}"
+                raise TypeError(msg)
+
+            if first:
+                first = False
+                if leading_break:
+                    yield item_break
+            else:
+                if separator:
+                    yield separator
+                yield item_break
+            yield key + "="
+            yield from layout_value(value)
+
+    def layout_tag(tag_obj, is_name=FRED_NAME.fullmatch):
+        tag, attrs, value = tag_obj.split()
+        if not is_name(tag):
+            tag = f'\\{encode_string(tag)}'
+
+        if value is None:
+            yield Begin(_indent)
+            yield f'({tag}'
+            yield from layout_attrs(attrs, True)
+            yield ')'
+            yield END
+        else:
+            yield tag
+            if attrs:
+                yield Begin(_indent)
+                yield ' ('
+                yield from layout_attrs(attrs, False)
+                yield ')'
+                yield END
+            yield ' '
+            yield from layout_value(value)
+
+    def layout_container(obj, isinstance=isinstance):
+        convert = _type_encoder(type(obj))
+        if convert is None:
+            if isinstance(obj, sequence):
+                yield from layout_list(obj)
+                return
+            elif isinstance(obj, dict):
+                yield from layout_dict(obj)
+                return
+            elif isinstance(obj, Tag):
+                yield from layout_tag(obj)
+                return
+            elif isinstance(obj, _iter_types):
+                yield from layout_list(obj)
+                return
+            convert = _default
+
+        if markers is not None:
+            marker_id = id(obj)
+            if marker_id in markers:
+                raise ValueError("Circular reference detected")
+            markers[marker_id] = obj
+            obj = convert(obj)
+            yield from layout_value(obj)
+            del markers[marker_id]
+        else:
+            obj = convert(obj)
+            yield from layout_value(obj)
+
+    def layout_value(obj):
+        try:
+            yield encode_atom(obj)
+        except _EncodeError:
+            yield from layout_container(obj)
+
+    return layout_value
@@ -0,0 +1,107 @@
+"""
+Hash consing of decoded documents.
+
+Structurally identical subtrees of frozen documents are replaced by a single
+shared object. Keys are type sensitive, so that ``1``, ``1.0`` and ``True``
+or ``0.0`` and ``-0.0`` are never merged, and containers are keyed by the
+identities of their children, which are already unique when their parents
+are built.
+"""
+from collections.abc import Mapping
+from datetime import date, time, datetime
+
+from .types import FrozenDict, FrozenTag, Tag
+
+CONTAINERS = frozenset([FrozenDict, tuple, FrozenTag])
+REPR_KEYS = frozenset([float, date, time, datetime])
+
+
+def child_key(obj):
+    cls = type(obj)
+    if cls in CONTAINERS:
+        return id(obj)
+    elif cls in REPR_KEYS:
+        return cls, repr(obj)
+    return cls, obj
+
+
+def structural_key(obj):
+    """
+    Return a key of obj that is equal for equal values of the same types.
+
+    Unlike obj itself, keys of ``1``, ``1.0`` and ``True`` or of tags and
+    containers that hold them differ. Keys of unhashable values are
+    unhashable.
+    """
+    cls = type(obj)
+    if isinstance(obj, Tag):
+        tag, attrs, value = obj.split()
+        return cls, tag, structural_key(attrs) if attrs else (), structural_key(value)
+    elif isinstance(obj, tuple):
+        return (cls, *map(structural_key, obj))
+    elif isinstance(obj, Mapping):
+        return (cls, *((structural_key(k), structural_key(v)) for k, v in obj.items()))
+    elif isinstance(obj, frozenset):
+        return cls, frozenset(map(structural_key, obj))
+    elif cls in REPR_KEYS:
+        return cls, repr(obj)
+    return cls, obj
+
+
+class HashCons:
+    """
+    Table of unique subtrees shared by one or more decoded documents.
+
+    Pass an instance to ``FREDDecoder(hash_cons=...)`` to share subtrees
+    between documents and inspect the number of nodes and the resulting
+    deduplication ratio.
+    """
+
+    def __init__(self):
+        self.table = {}
+        self.nodes = 0
+
+    @property
+    def unique(self) -> int:
+        """Number of distinct subtrees"""
+        return len(self.table)
+
+    @property
+    def ratio(self) -> float:
+        """Number of decoded subtrees per distinct subtree"""
+        return self.nodes / len(self.table) if self.table else 1.0
+
+    def __repr__(self):
+        return f"HashCons(nodes={self.nodes}, unique={self.unique}, ratio={self.ratio:.2f})"
+
+    def cons(self, key, obj):
+        """
+        Return the subtree stored under key or store obj.
+        """
+        try:
+            obj = self.table.setdefault(key, obj)
+        except TypeError:
+            return obj
+        self.nodes += 1
+        return obj
+
+    def dict(self, pairs):
+        """Object hook"""
+        key = (FrozenDict, *((k, child_key(v)) for k, v in pairs))
+        return self.cons(key, FrozenDict(pairs))
+
+    def tuple(self, items):
+        """Array hook"""
+        key = (tuple, *map(child_key, items))
+        return self.cons(key, tuple(items))
+
+    def tag_hook(self, tag_hook=FrozenTag.new):
+        """
+        Wrap a tag hook that creates FrozenTags.
+        """
+
+        def hook(tag, attrs, value):
+            key = (FrozenTag, str(tag), child_key(attrs) if attrs else (), child_key(value))
+            return self.cons(key, tag_hook(tag, attrs, value))
+
+        return hook
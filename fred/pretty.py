@@ -0,0 +1,175 @@
+"""
+Oppen's pretty printing algorithm.
+
+A document is a stream of tokens: strings, Begin and End markers that
+delimit blocks and Breaks, which are rendered either as blank space or as a
+line break followed by indentation. The printer keeps a lookahead buffer of
+at most one line, so it runs in linear time and emits output as it reads
+tokens.
+
+Reference: D. C. Oppen, "Prettyprinting", ACM TOPLAS 2(4), 1980.
+"""
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple
+
+
+class Begin(NamedTuple):
+    """
+    Start a block whose lines are indented by offset relative to the
+    enclosing block. If consistent, either all breaks of the block are line
+    breaks or none of them.
+    """
+
+    offset: int = 0
+    consistent: bool = False
+
+
+class Break(NamedTuple):
+    """
+    Optional line break. Renders as ``blank`` spaces if it fits, or as a line
+    break indented by ``offset`` relative to the enclosing block otherwise.
+    """
+
+    blank: int = 1
+    offset: int = 0
+
+
+END = object()
+INFINITY = 0xFFFF_FFFF
+
+
+def pretty(tokens: Iterable, width: int = 80) -> Iterator[str]:
+    """
+    Lay out tokens in lines of the given width and yield the output text.
+
+    Strings longer than the width are never split and lines may overflow
+    when no break is available.
+    """
+    # Sizes of tokens in the buffer: the length of strings, the length of
+    # the blocks and the length up to the next break for breaks. Negative
+    # sizes are not computed yet.
+    buf = deque()
+    base = 0  # absolute index of buf[0]
+    scan_stack = deque()
+    left_total = right_total = 0
+
+    # Printing state
+    out = []
+    space = width
+    indent = 0
+    pending = 0
+    print_stack = []
+
+    def print_token(token, size):
+        nonlocal space, indent, pending
+        if type(token) is str:
+            if pending:
+                out.append(" " * pending)
+                pending = 0
+            out.append(token)
+            space -= len(token)
+        elif type(token) is Break:
+            if print_stack:
+                frame = print_stack[-1]
+                fits = frame is None or not frame[1] and size <= space
+            else:
+                fits = size <= space
+            if fits:
+                pending += token.blank
+                space -= token.blank
+            else:
+                out.append("\n")
+                pending = indent + token.offset
+                space = width - pending
+        elif type(token) is Begin:
+            if size > space:
+                print_stack.append((indent, token.consistent))
+                indent += token.offset
+            else:
+                print_stack.append(None)
+        else:
+            frame = print_stack.pop()
+            if frame is not None:
+                indent = frame[0]
+
+    def advance_left():
+        nonlocal base, left_total
+        while buf and buf[0][1] >= 0:
+            token, size = buf.popleft()
+            base += 1
+            if type(token) is str:
+                left_total += size
+            elif type(token) is Break:
+                left_total += token.blank
+            print_token(token, size)
+
+    def check_stream():
+        while right_total - left_total > space and buf:
+            if scan_stack and scan_stack[0] == base:
+                scan_stack.popleft()
+                buf[0][1] = INFINITY
+            advance_left()
+
+    def check_stack(depth):
+        while scan_stack:
+            entry = buf[scan_stack[-1] - base]
+            token = entry[0]
+            if type(token) is Begin:
+                if depth == 0:
+                    break
+                scan_stack.pop()
+                entry[1] += right_total
+                depth -= 1
+            elif token is END:
+                scan_stack.pop()
+                entry[1] = 1
+                depth += 1
+            else:
+                scan_stack.pop()
+                entry[1] += right_total
+                if depth == 0:
+                    break
+
+    for token in tokens:
+        if type(token) is str:
+            if not scan_stack:
+                print_token(token, len(token))
+            else:
+                buf.append([token, len(token)])
+                right_total += len(token)
+                check_stream()
+        elif type(token) is Break:
+            if not scan_stack:
+                left_total = right_total = 1
+                base += len(buf)
+                buf.clear()
+            else:
+                check_stack(0)
+            scan_stack.append(base + len(buf))
+            buf.append([token, -right_total])
+            right_total += token.blank
+        elif type(token) is Begin:
+            if not scan_stack:
+                left_total = right_total = 1
+                base += len(buf)
+                buf.clear()
+            scan_stack.append(base + len(buf))
+            buf.append([token, -right_total])
+        elif token is END:
+            if not scan_stack:
+                print_token(token, 0)
+            else:
+                scan_stack.append(base + len(buf))
+                buf.append([token, -1])
+        else:
+            raise TypeError(f"invalid token: {token!r}")
+
+        if out:
+            yield "".join(out)
+            out.clear()
+
+    if scan_stack:
+        check_stack(0)
+        advance_left()
+    if out:
+        yield "".join(out)
@@ -4,9 +4,10 @@ class Context:
         base = "/".join(self._paths)
         return base + "/" + str(self._field) if self._field else base
 
-    def __init__(self):
+    def __init__(self, copy=True):
         self._paths = []
         self._field = None
+        self.copy = copy
 
     def push_path(self, path):
         self._paths.append(path)
@@ -0,0 +1,142 @@
+import datetime
+from typing import Callable, Any, Optional
+
+from .context import Context
+from .validators import LIB, get_std_validator
+from ..encoder import FREDEncoder, encode_key, encode_string, encode_byte_string, is_fred_name
+from ..types import Tag
+
+Encoder = Callable[[Optional[Context], Any], str]
+generic_encode = FREDEncoder().encode
+ATOM_ENCODERS = {
+    "Date": datetime.date.__str__,
+    "Datetime": lambda x, _str=datetime.datetime.__str__: _str(x).replace(" ", "_"),
+    "Time": datetime.time.__str__,
+    "String": encode_string,
+    "Bool": lambda x: "true" if x else "false",
+    "Bytes": encode_byte_string,
+    "Int": int.__repr__,
+    "Float": float.__repr__,
+}
+
+
+def make_encoder(spec: Tag, memo: dict, lib: dict = None) -> Encoder:
+    """
+    Create an encoder from declaration.
+
+    Encoders receive a context and a value and return its FRED representation.
+    If the context is None, the value is assumed to be valid and it is encoded
+    without any checks.
+    """
+    tag, attrs, value = spec.split()
+    lib = LIB if lib is None else lib
+
+    if isinstance(value, Tag):
+        value_encoder = get_encoder(value, memo, lib)
+
+    elif isinstance(value, list) and len(value) == 1:
+        value_encoder = list_encoder(get_encoder(value[0], memo, lib))
+
+    elif isinstance(value, dict):
+        spec = {}
+        for k, v in value.items():
+            if v.tag.endswith("?"):
+                spec[k] = False, get_encoder(v.retag(v.tag[:-1]), memo, lib)
+            else:
+                spec[k] = True, get_encoder(v, memo, lib)
+        value_encoder = object_encoder(spec)
+
+    else:
+        raise TypeError(f"invalid schema spec, {spec!r}")
+
+    encoder = tag_encoder(tag, value_encoder)
+    memo[tag] = encoder
+    return encoder
+
+
+def get_encoder(value: Tag, memo: dict, lib: dict) -> Encoder:
+    if value.tag in memo:
+        return memo[value.tag]
+    validator = get_std_validator(value, lib)
+    return atom_encoder(ATOM_ENCODERS.get(value.tag, generic_encode), validator)
+
+
+def atom_encoder(encode, validator) -> Encoder:
+    """
+    Encoder for values declared with builtin types.
+    """
+
+    def encoder(ctx, x):
+        if ctx is not None:
+            x = validator(ctx, x)
+        return encode(x)
+
+    return encoder
+
+
+def tag_encoder(tag, value_encoder) -> Encoder:
+    """
+    Encoder for a tagged value with the given tag name.
+    """
+    prefix = tag if is_fred_name(tag) else f"\\{encode_string(tag)}"
+
+    def encoder(ctx, obj):
+        if ctx is not None and not isinstance(obj, Tag):
+            ctx.type_error("not a tag")
+
+        _, attrs, value = obj.split()
+        data = value_encoder(ctx, value)
+        if attrs:
+            attrs = " ".join(f"{encode_key(k)}={generic_encode(v)}" for k, v in attrs.items())
+            return f"{prefix} ({attrs}) {data}"
+        return f"{prefix} {data}"
+
+    return encoder
+
+
+def list_encoder(item_encoder) -> Encoder:
+    """
+    Encoder for lists of elements of the same type.
+    """
+
+    def encoder(ctx, lst):
+        if ctx is not None and not isinstance(lst, list):
+            ctx.type_error("expect a list")
+        return "[" + " ".join([item_encoder(ctx, item) for item in lst]) + "]"
+
+    return encoder
+
+
+def object_encoder(spec: dict) -> Encoder:
+    """
+    Encoder for objects with known fields. Fields are written in the order of
+    declaration and missing optional fields are written as null.
+    """
+    fields = [
+        (field, f"{encode_key(field)}: ", is_required, item_encoder)
+        for field, (is_required, item_encoder) in spec.items()
+    ]
+
+    def encoder(ctx, obj):
+        if ctx is not None:
+            if not isinstance(obj, dict):
+                ctx.type_error("expect a dict")
+            for field in obj:
+                if field not in spec:
+                    ctx.set_field(field)
+                    ctx.value_error(f"unexpected field: {field}")
+
+        parts = []
+        for field, prefix, is_required, item_encoder in fields:
+            value = obj.get(field)
+            if value is None and not is_required:
+                parts.append(prefix + "null")
+                continue
+            if ctx is not None:
+                ctx.set_field(field)
+                if field not in obj:
+                    ctx.value_error(f"missing field {field}")
+            parts.append(prefix + item_encoder(ctx, value))
+        return "{" + " ".join(parts) + "}"
+
+    return encoder
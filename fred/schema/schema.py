@@ -1,7 +1,12 @@
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 from .context import Context
-from .validators import make_validator
+from .encoders import make_encoder
+from .stream import ValueReader, tokenize
+from .utils import LRUCache
+from .validators import make_validator, get_validator, object_spec, LIB
 from .. import load, loads
 from ..decoder import FREDDecoder
 from ..types import Tag
@@ -21,15 +26,20 @@ class Schema:
     exported: list
     declarations: dict
 
-    def __init__(self, id: str, exported: list, declarations: dict, **kwargs):
+    def __init__(self, id: str, exported: list, declarations: dict, cache_size=0, **kwargs):
         self.id = id
         self.exported = exported
         self.declarations = declarations
         self.decoder = FREDDecoder(**kwargs)
         self.validators = {}
+        self.encoders = {}
+        self.cache_size = cache_size
+        self._decoder_kwargs = kwargs
 
+        cache = LRUCache(cache_size) if cache_size else None
         for decl in declarations.values():
-            make_validator(decl, self.validators)
+            make_validator(decl, self.validators, cache=cache)
+            make_encoder(decl, self.encoders)
 
     def loads(self, src):
         """
@@ -41,7 +51,7 @@ class Schema:
 
         """
         data = self.decoder.decode(src)
-        return self.validate(data)
+        return self.validate(data, copy=False)
 
     def load(self, fd):
         """
@@ -53,25 +63,218 @@ class Schema:
 
         """
         data = self.decoder.decode(fd.read())
-        return self.validate(data)
+        return self.validate(data, copy=False)
 
-    def validate(self, data):
+    def dumps(self, obj, validate=False) -> str:
+        """
+        Serialize a tagged value declared in the schema to a FRED string.
+
+        The encoder is specialized to the declaration of the root tag: object
+        fields are written in the order of declaration and missing optional
+        fields are written as null.
+
+        Args:
+            obj:
+                A tagged value whose tag is exported by the schema.
+            validate:
+                If True, validate obj during encoding.
+        """
+        tag = obj.tag
+        if tag not in self.exported:
+            raise VALIDATION_ERROR(f"invalid root tag: {tag}")
+        ctx = Context() if validate else None
+        return self.encoders[tag](ctx, obj)
+
+    def dump(self, obj, fd, validate=False):
+        """
+        Serialize obj to a FRED formatted stream using fd's write method.
+
+        See :meth:`dumps` for the meaning of the arguments.
+        """
+        fd.write(self.dumps(obj, validate=validate))
+
+    def iter_load(self, fd, return_errors=False):
+        """
+        Validate a document while it is read from a file-like object.
+
+        The root tag must be declared as a list or an object. Each element of
+        a list is yielded as soon as it is decoded and validated. Objects
+        yield (field, value) pairs, followed by missing optional fields with a
+        None value. Memory usage is bounded by the size of the largest element.
+
+        Args:
+            fd:
+                A file-like object opened in text or binary mode.
+            return_errors:
+                If True, errors for invalid elements are yielded in place and
+                reading continues. Otherwise, reading stops at the first invalid
+                element and the error is raised.
+        """
+        reader = ValueReader(tokenize(fd))
+        tag, bracket = reader.header()
+        if tag not in self.exported:
+            raise VALIDATION_ERROR(f"invalid root tag: {tag}")
+        decl = self.declarations[tag].value
+        decode = self.decoder.decode
+        ctx = Context(copy=False)
+        ctx.push_path(tag)
+
+        if isinstance(decl, list):
+            if bracket != "[":
+                ctx.type_error("expect a list")
+            validator = get_validator(decl[0], self.validators, LIB)
+
+            for idx, src in enumerate(reader.items()):
+                ctx.set_field(idx)
+                try:
+                    result = validator(ctx, decode(src))
+                except (TypeError, ValueError) as exc:
+                    if not return_errors:
+                        raise
+                    result = exc
+                yield result
+
+        elif isinstance(decl, dict):
+            if bracket != "{":
+                ctx.type_error("expect a dict")
+            spec = object_spec(tag, decl, self.validators, LIB)
+            missing = set(spec)
+
+            for key, src in reader.pairs():
+                field = decode(key) if key.startswith('"') else key
+                ctx.set_field(field)
+                try:
+                    if field not in spec:
+                        ctx.value_error(f"unexpected field: {field}")
+                    missing.discard(field)
+                    is_required, validator = spec[field]
+                    value = decode(src)
+                    if is_required or value is not None:
+                        value = validator(ctx, value)
+                    result = field, value
+                except (TypeError, ValueError) as exc:
+                    if not return_errors:
+                        raise
+                    result = exc
+                yield result
+
+            for field in [f for f in spec if f in missing]:
+                ctx.set_field(field)
+                try:
+                    if spec[field][0]:
+                        ctx.value_error(f"missing field {field}")
+                    result = field, None
+                except ValueError as exc:
+                    if not return_errors:
+                        raise
+                    result = exc
+                yield result
+
+        else:
+            raise VALIDATION_ERROR(f"{tag} must be declared as a list or object")
+
+    def validate(self, data, copy=True):
         """
         Validate and normalize a parsed FRED structure.
+
+        If copy is False, do not rebuild containers. The input is only checked
+        and it is mutated in place wherever normalization is required (e.g.,
+        filling missing optional fields with None).
         """
+        ctx = Context(copy=copy)
+        if not isinstance(data, Tag):
+            ctx.type_error("root must be a tag")
         tag, attrs, value = data.split()
         if tag not in self.exported:
             raise VALIDATION_ERROR(f"invalid root tag: {tag}")
         validator = self.validators[tag]
-        ctx = Context()
         return validator(ctx, data)
 
+    def validate_many(self, iterable, workers=None, chunk_size=256, return_errors=False):
+        """
+        Validate a collection of FRED structures and return a list of results
+        in the same order of the input.
+
+        Args:
+            iterable:
+                An iterable of parsed FRED structures.
+            workers:
+                If given, distribute validation to a pool with this many
+                processes. Records are sent in batches of ``chunk_size``
+                elements and each worker holds its own copy of the schema.
+            return_errors:
+                If True, validation errors are placed in the result list in
+                the position of the corresponding invalid records. Otherwise,
+                the error for the first invalid record is raised.
+        """
+        if workers is None or workers <= 1:
+            results = _validate_batch(self, iterable, copy=True)
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self,)) as pool:
+                batches = pool.map(_validate_worker_batch, _batches(iterable, chunk_size))
+                results = [item for batch in batches for item in batch]
+
+        if not return_errors:
+            for ok, value in results:
+                if not ok:
+                    raise value
+        return [value for _, value in results]
+
+    def __reduce__(self):
+        # Validators are closures and cannot be pickled: rebuild them from
+        # the declarations
+        kwargs = {"cache_size": self.cache_size, **self._decoder_kwargs}
+        args = (self.id, self.exported, self.declarations, kwargs)
+        return _rebuild_schema, (self.__class__, *args)
+
+
+#
+# Auxiliary functions
+#
+def _rebuild_schema(cls, id, exported, declarations, kwargs):
+    return cls(id, exported, declarations, **kwargs)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def _validate_batch(schema, batch, copy):
+    validate = schema.validate
+    results = []
+    for data in batch:
+        try:
+            results.append((True, validate(data, copy=copy)))
+        except (TypeError, ValueError) as exc:
+            results.append((False, exc))
+    return results
+
+
+_worker_schema = None
+
+
+def _init_worker(schema):
+    global _worker_schema
+    _worker_schema = schema
+
+
+def _validate_worker_batch(batch):
+    # Records are private copies in the worker process, hence no need to copy
+    return _validate_batch(_worker_schema, batch, copy=False)
+
 
-def schema(data):
+def schema(data, **kwargs):
     """
 
     Args:
         data:
+        cache_size:
+            Maximum number of memoized validation results of hashable values
+            (e.g., FrozenTags). Memoization is disabled by default.
 
     Returns:
 
@@ -80,7 +283,7 @@ def schema(data):
         data = loads(data)
     elif not isinstance(data, Tag):
         data = load(data)
-    return Schema(*parse_schema(data))
+    return Schema(*parse_schema(data), **kwargs)
 
 
 def parse_schema(scm: Tag) -> TypeSchema:
@@ -0,0 +1,230 @@
+"""
+Incremental scanner that splits the payload of a FRED document into the source
+text of its elements without reading the whole stream.
+"""
+import codecs
+import re
+from typing import Iterator, Tuple
+
+from ..exceptions import FREDDecodeError
+from ..parser import TERMINALS, parse_string
+
+CHUNK_SIZE = 64 * 1024
+KEYWORDS = {"true", "false", "null", "inf", "-inf", "nan"}
+FRED_NAME = re.compile(TERMINALS["NAME"])
+TOKEN_RE = re.compile(
+    r"""
+      (?P<ws>(?:[\s,]+|;[^\n]*)+)
+    | (?P<string>"[^\\"]*(?:\\.[^\\"]*)*")
+    | (?P<bytes>`[^\\`]*(?:\\.[^\\`]*)*`)
+    | (?P<open>\$\(|[\[{(])
+    | (?P<close>[\]})])
+    | (?P<word>(?:\\[()]|[^\s,;"`\[\]{}()\\$]|\$(?!\())+|\\|\$)
+    | (?P<error>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+IS_BLANK = re.compile(r"(?:[\s,]+|;[^\n]*)+").fullmatch
+Token = Tuple[str, str]
+
+
+def tokenize(fd, chunk_size=CHUNK_SIZE) -> Iterator[Token]:
+    """
+    Iterate over (kind, text) tokens read from a file-like object.
+
+    The scanner only understands enough of FRED syntax to delimit values:
+    strings, brackets, whitespace and comments. Every other sequence of
+    characters is returned as a "word".
+
+    Tokens may be longer than chunk_size. Incomplete tokens are scanned again
+    after more data is read, and reads grow with the pending text, so long
+    tokens are scanned a logarithmic number of times.
+    """
+    read = fd.read
+    decode = None
+    match = TOKEN_RE.match
+    buf = ""
+    pos = 0
+    eof = False
+
+    while True:
+        m = match(buf, pos)
+        if m is None or not eof and (m.end() == len(buf) or m.lastgroup == "error"):
+            if eof:
+                return
+            data = read(max(chunk_size, len(buf) - pos))
+            if isinstance(data, (bytes, bytearray)):
+                if decode is None:
+                    decode = codecs.getincrementaldecoder("utf-8")().decode
+                data = decode(data, final=not data)
+            elif not data:
+                data = ""
+            if not data:
+                eof = True
+            buf = buf[pos:] + data
+            pos = 0
+            continue
+
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "error":
+            raise FREDDecodeError(f"unexpected {m.group()!r}", None, None)
+        yield kind, m.group()
+
+
+class ValueReader:
+    """
+    Read the source text of complete values from a token stream.
+    """
+
+    def __init__(self, tokens: Iterator[Token]):
+        self._tokens = tokens
+
+    def next(self, parts=None) -> Token:
+        """
+        Return the next non-whitespace token. Whitespace is appended to parts.
+        """
+        for kind, text in self._tokens:
+            if kind != "ws":
+                return kind, text
+            elif parts is not None:
+                parts.append(text)
+        raise FREDDecodeError("unexpected end of document", None, None)
+
+    def header(self) -> Tuple[str, str]:
+        """
+        Read the root tag and its optional attributes and return a tuple with
+        the tag name and the opening bracket of its value.
+        """
+        kind, text = self.next()
+        if not self._is_tag(kind, text):
+            raise FREDDecodeError("root element must be a tagged value", None, None)
+        tag = parse_string(self.next()[1]) if text == "\\" else text
+
+        kind, text = self.next()
+        if kind == "open" and text == "(":
+            group = [text]
+            self.group(group)
+            if not self._is_attrs(group):
+                raise FREDDecodeError("root element must be a list or object", None, None)
+            kind, text = self.next()
+        if kind != "open" or text not in "[{":
+            raise FREDDecodeError("root element must be a list or object", None, None)
+        return tag, text
+
+    def items(self) -> Iterator[str]:
+        """
+        Iterate over the source of each element of a list until its closing
+        bracket.
+        """
+        while True:
+            token = self.next()
+            if token[0] == "close":
+                self._expect_end(token, "]")
+                return
+            yield self.value(token)
+
+    def pairs(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterate over (key, value) source pairs of an object until its
+        closing bracket.
+        """
+        while True:
+            kind, text = self.next()
+            if kind == "close":
+                self._expect_end((kind, text), "}")
+                return
+            elif kind == "string":
+                key = text
+                kind, text = self.next()
+                if kind != "word" or not text.startswith(":"):
+                    raise FREDDecodeError(f"expected ':', got {text!r}", None, None)
+                text = text[1:]
+            elif kind == "word" and ":" in text:
+                key, _, text = text.partition(":")
+            elif kind == "word":
+                key = text
+                kind, text = self.next()
+                if kind != "word" or not text.startswith(":"):
+                    raise FREDDecodeError(f"expected ':', got {text!r}", None, None)
+                text = text[1:]
+            else:
+                raise FREDDecodeError(f"invalid key: {text!r}", None, None)
+
+            token = ("word", text) if text else self.next()
+            yield key, self.value(token)
+
+    def value(self, token: Token) -> str:
+        """
+        Return the source of the value that starts with the given token.
+        """
+        parts = []
+        self._value(token, parts)
+        return "".join(parts)
+
+    def group(self, parts):
+        """
+        Consume tokens until the group opened by the last token is closed.
+        """
+        depth = 1
+        for kind, text in self._tokens:
+            parts.append(text)
+            if kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth -= 1
+                if depth == 0:
+                    return
+        raise FREDDecodeError("unexpected end of document", None, None)
+
+    def _value(self, token, parts):
+        kind, text = token
+        parts.append(text)
+        if kind == "open":
+            self.group(parts)
+        elif text == "$" or text == "\\":
+            kind, text = self.next()
+            if kind != "string":
+                raise FREDDecodeError(f"expected string, got {text!r}", None, None)
+            parts.append(text)
+            if parts[-2] == "\\":
+                self._tag_value(parts)
+        elif self._is_tag(kind, text):
+            self._tag_value(parts)
+
+    def _tag_value(self, parts):
+        parts.append(" ")
+        token = self.next(parts)
+        if token == ("open", "("):
+            group = [token[1]]
+            self.group(group)
+            parts.extend(group)
+            if not self._is_attrs(group):
+                return
+            token = self.next(parts)
+        self._value(token, parts)
+
+    def _expect_end(self, token, bracket):
+        if token[1] != bracket:
+            raise FREDDecodeError(f"unexpected {token[1]!r}", None, None)
+        for kind, text in self._tokens:
+            if kind != "ws":
+                raise FREDDecodeError(f"unexpected {text!r} after the root element", None, None)
+
+    @staticmethod
+    def _is_tag(kind, text):
+        return kind == "word" and (
+            text == "\\" or text not in KEYWORDS and FRED_NAME.fullmatch(text)
+        )
+
+    @staticmethod
+    def _is_attrs(group):
+        # Distinguish attributes "(key=value ...)" from an enclosed tag
+        # "(tag key=value ...)" using the first significant tokens.
+        tokens = [tk for tk in group[1:] if not IS_BLANK(tk)][:2]
+        if tokens[0] == ")":
+            return True
+        key = tokens[0]
+        if key.startswith('"'):
+            return len(tokens) > 1 and tokens[1].startswith("=")
+        return "=" in key or len(tokens) > 1 and tokens[1].startswith("=")
@@ -1,6 +1,8 @@
 import operator
+from collections import OrderedDict
 from typing import Callable, Any, List
 
+from fred.hashcons import structural_key
 from fred.schema.context import Context
 from fred.types import Tag
 
@@ -155,9 +157,71 @@ def extract_propositions(name, validations, args) -> List[Validator]:
         raise ValueError(f"invalid type proposition for {name}: {value}")
 
 
+def cached_validator(name, validator: Validator, cache: "LRUCache") -> Validator:
+    """
+    Wrap validator to memoize results for hashable inputs such as FrozenTags.
+
+    Results are stored in the cache under the name and the structural key
+    of the value, so that equal values of different types, like 1 and 1.0,
+    are validated separately. Only successful validations with hashable,
+    and thus immutable, results are cached since hits share the result.
+    """
+
+    def validator_cache(ctx, x):
+        if type(x).__hash__ is None:
+            return validator(ctx, x)
+        key = (name, structural_key(x))
+        try:
+            result = cache.get(key, NOT_GIVEN)
+        except TypeError:
+            return validator(ctx, x)
+        if result is NOT_GIVEN:
+            result = validator(ctx, x)
+            try:
+                hash(result)
+            except TypeError:
+                return result
+            cache[key] = result
+        return result
+
+    return validator_cache
+
+
 #
 # Utilities
 #
+class LRUCache:
+    """
+    Bounded mapping that discards the least recently used items.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            return default
+        data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+
 def set_name(name):
     """
     Decorator that sets the __name__ and __qualname__ of a function.
@@ -8,10 +8,11 @@ from .utils import (
     extract_propositions,
     range_validator,
     exclude_validator,
+    cached_validator,
     Validator,
     NOT_GIVEN,
 )
-from ..types import Symbol, Tag
+from ..types import Symbol, Tag, FrozenDict
 
 INT_VALIDATORS = {
     Symbol("ODD"): predicate_validator(lambda x: x % 2 == 1, "integer must be odd"),
@@ -25,9 +26,12 @@ FLOAT_VALIDATORS = {
 }
 
 
-def make_validator(spec: Tag, memo: dict, lib: dict = None) -> Validator:
+def make_validator(spec: Tag, memo: dict, lib: dict = None, cache=None) -> Validator:
     """
     Create a validator from declaration.
+
+    If an LRUCache is given, results of validating hashable values (e.g.,
+    FrozenTags) are memoized.
     """
     tag, attrs, value = spec.split()
     lib = LIB if lib is None else lib
@@ -46,29 +50,39 @@ def make_validator(spec: Tag, memo: dict, lib: dict = None) -> Validator:
 
     elif isinstance(value, list):
         if len(value) == 1:
-            value_validator = make_validator(Tag("List", value[0]), memo, lib)
+            value_validator = list_validator(get_validator(value[0], memo, lib))
         else:
             raise NotImplementedError
 
     elif isinstance(value, dict):
-        obj_spec = {}
-        for k, v in value.items():
-            if not isinstance(v, Tag):
-                raise ValueError("invalid type declaration at {tag}.{k}")
-            if v.tag.endswith("?"):
-                obj_spec[k] = False, get_validator(v.retag(v.tag[:-1]), memo, lib)
-            else:
-                obj_spec[k] = True, get_validator(v, memo, lib)
-        value_validator = object_validator(obj_spec)
+        value_validator = object_validator(object_spec(tag, value, memo, lib))
 
     else:
         raise TypeError(f"invalid schema spec, {spec!r}")
 
     validator = tag_validator(tag, attrs_validator, value_validator)
+    if cache is not None:
+        validator = cached_validator(tag, validator, cache)
     memo[tag] = validator
     return validator
 
 
+def object_spec(tag, value: dict, memo: dict, lib: dict) -> dict:
+    """
+    Return a mapping from field names to (is_required, validator) pairs from
+    the declaration of an object.
+    """
+    spec = {}
+    for k, v in value.items():
+        if not isinstance(v, Tag):
+            raise ValueError(f"invalid type declaration at {tag}.{k}")
+        if v.tag.endswith("?"):
+            spec[k] = False, get_validator(v.retag(v.tag[:-1]), memo, lib)
+        else:
+            spec[k] = True, get_validator(v, memo, lib)
+    return spec
+
+
 def get_std_validator(value, lib):
     tag, attrs, value = value.split()
     if value is None:
@@ -95,14 +109,32 @@ def tag_validator(*args, **kwargs):
             ctx.type_error("not a tag")
             return obj
 
-        tag, attrs, obj = obj.split()
-        attrs = attrs_validator(ctx, attrs)
-        obj = obj_validator(ctx, obj)
-        return Tag.new(tag, attrs, obj)
+        tag, attrs, value = obj.split()
+        new_attrs = attrs_validator(ctx, attrs)
+        new_value = obj_validator(ctx, value)
+        if new_attrs is attrs and new_value is value and not (ctx is None or ctx.copy):
+            return obj
+        return obj.new(tag, new_attrs, new_value)
 
     return validator
 
 
+def _in_place(ctx, obj, cls):
+    # Only plain lists and dicts are mutated. Other containers, such as
+    # frozen ones, are copied.
+    return ctx is not None and not ctx.copy and type(obj) is cls
+
+
+def _refreeze(obj, result):
+    # Copies of frozen containers stay immutable, so they can be cached
+    if result is not obj:
+        if isinstance(obj, FrozenDict):
+            return FrozenDict(result)
+        elif isinstance(obj, tuple):
+            return tuple(result)
+    return result
+
+
 def list_validator(*args, **kwargs):
     """
     Receives a single validator as positional argument and return a validator
@@ -112,10 +144,17 @@ def list_validator(*args, **kwargs):
     item_validator, = args
 
     def validator(ctx, lst):
-        if not isinstance(lst, list):
+        if not isinstance(lst, (list, tuple)):
             ctx.type_error("expect a list")
             return lst
-        return [item_validator(ctx, item) for item in lst]
+        if not _in_place(ctx, lst, list):
+            return _refreeze(lst, [item_validator(ctx, item) for item in lst])
+
+        for i, item in enumerate(lst):
+            value = item_validator(ctx, item)
+            if value is not item:
+                lst[i] = value
+        return lst
 
     return validator
 
@@ -130,7 +169,7 @@ def object_validator(*args, **kwargs):
             return obj
 
         missing = set(validator_spec)
-        result = {}
+        result = obj if _in_place(ctx, obj, dict) else {}
 
         for field, value in obj.items():
             ctx.set_field(field)
@@ -142,7 +181,9 @@ def object_validator(*args, **kwargs):
                 if not is_required and value is None:
                     result[field] = None
                 else:
-                    result[field] = item_validator(ctx, value)
+                    new_value = item_validator(ctx, value)
+                    if result is not obj or new_value is not value:
+                        result[field] = new_value
                 missing.discard(field)
         for field in missing:
             if validator_spec[field][0]:
@@ -150,7 +191,7 @@ def object_validator(*args, **kwargs):
                 ctx.value_error(f"missing field {field}")
             else:
                 result[field] = None
-        return result
+        return _refreeze(obj, result)
 
     return validator
 
@@ -165,7 +206,14 @@ def dict_validator(*args, **kwargs):
             return dic
 
         # Syntax guarantees that keys are always valid
-        return {k: validator_decl(ctx, v) for k, v in dic.items()}
+        if not _in_place(ctx, dic, dict):
+            return _refreeze(dic, {k: validator_decl(ctx, v) for k, v in dic.items()})
+
+        for k, v in dic.items():
+            value = validator_decl(ctx, v)
+            if value is not v:
+                dic[k] = value
+        return dic
 
     return validator
 
@@ -1,2 +1,3 @@
+from .frozen_dict import FrozenDict
 from .symbol import Symbol
 from .tag import Tag, FrozenTag
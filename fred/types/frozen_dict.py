@@ -0,0 +1,42 @@
+FROZEN_ERROR = "FrozenDict objects are immutable"
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError(FROZEN_ERROR)
+
+
+class FrozenDict(dict):
+    """
+    Immutable and hashable dictionary.
+
+    The hash is computed from the items on first use and cached, like in
+    FrozenTag.
+    """
+
+    __slots__ = ("_hash",)
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        try:
+            h = self._hash
+            if h == -1:
+                raise TypeError
+            return h
+        except AttributeError:
+            try:
+                self._hash = hash(frozenset(self.items()))
+            except TypeError:
+                self._hash = -1
+                raise
+            return self._hash
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict.__repr__(self)})"
+
+    def copy(self):
+        return self
@@ -43,6 +43,9 @@ class Symbol:
             SYMBOLS[value] = symb
             return symb
 
+    def __reduce__(self):
+        return Symbol, (self._value,)
+
     def __repr__(self):
         return "Symbol(%r)" % self._value
 
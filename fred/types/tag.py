@@ -1,4 +1,5 @@
 import re
+import sys
 from types import MappingProxyType
 from typing import Mapping, Tuple, Any, Pattern
 
@@ -7,6 +8,9 @@ from .symbol import Symbol, SymbolS
 ATOMIC_VALUE_KEY_ERROR = "cannot access key of atomic value"
 ATOMIC_VALUE_LEN_ERROR = "atomic value does not have length"
 
+# Read-only attributes shared by compact tags without attributes
+EMPTY_ATTRS = MappingProxyType({})
+
 
 class Tag:
     """
@@ -18,7 +22,13 @@ class Tag:
 
     tag = property(lambda self: self._tag)
     value = property(lambda self: self._value)
-    attrs = property(lambda self: self._attrs)
+
+    @property
+    def attrs(self):
+        attrs = self._attrs
+        if attrs is EMPTY_ATTRS:
+            attrs = self._attrs = {}
+        return attrs
 
     _tag: str
     _value: Any
@@ -45,6 +55,20 @@ class Tag:
         tagged = object.__new__(cls)
         return tagged.__init(tag, attrs, value)
 
+    @classmethod
+    def compact(cls, tag: SymbolS, attrs: Mapping, value: object):
+        """
+        Like :meth:`new`, but saves memory in large documents: tag names are
+        interned and tags without attributes share a single read-only
+        mapping, which is replaced by a new dict when the attrs property is
+        accessed.
+        """
+        tagged = object.__new__(cls).__init(tag, attrs, value)
+        tagged._tag = sys.intern(tagged._tag)
+        if not attrs:
+            tagged._attrs = EMPTY_ATTRS
+        return tagged
+
     def __init__(self, tag: SymbolS, value=None, **kwargs):
         kwargs = {k.replace("_", "-"): v for k, v in kwargs.items()}
         self.__init(tag, kwargs, value)
@@ -60,12 +84,17 @@ class Tag:
         self._value = value
         return self
 
+    def __reduce__(self):
+        # Cached hashes of FrozenTag are not valid in other processes
+        attrs = {} if self._attrs is EMPTY_ATTRS else self._attrs
+        return self.__class__.new, (self._tag, attrs, self._value)
+
     def __repr__(self):
         name = self.__class__.__name__
         kwargs = ""
-        if self.attrs:
+        if self._attrs:
             kwargs = ", " + ", ".join("%s=%r" % p for p in self._attrs.items())
-        value = "" if self._value is None else ", %r" % self._value
+        value = "" if self._value is None else ", %r" % (self._value,)
         return "%s(%r%s%s)" % (name, self._tag, value, kwargs)
 
     def __str__(self):
@@ -130,6 +159,8 @@ class Tag:
         >>> tag, attrs, value = Tag('div', 'Hello').split()
         >>> tag, attrs, value
         ('div', {}, 'Hello')
+
+        Compact tags without attributes return a read-only empty mapping.
         """
         return self._tag, self._attrs, self._value
 
@@ -0,0 +1,63 @@
+import pytest
+
+from fred import Tag, Symbol, FREDDecodeError
+from fred.archive import Writer, Reader, compact
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'data.fra'
+    with Writer(path) as writer:
+        writer.add('b', Tag('point', {'x': 1, 'y': 2}))
+        writer.add('a', [1, 2, Symbol('three')])
+    return path
+
+
+class TestArchive:
+    def test_read_documents(self, path):
+        with Reader(path) as reader:
+            assert len(reader) == 2
+            assert 'a' in reader and 'c' not in reader
+            assert reader['b'] == Tag('point', {'x': 1, 'y': 2})
+            assert reader.get('c') is None
+            assert list(reader) == ['a', 'b']
+            assert list(reader.items()) == [('a', [1, 2, Symbol('three')]), ('b', Tag('point', {'x': 1, 'y': 2}))]
+
+    def test_text_documents(self, tmp_path):
+        path = tmp_path / 'text.fra'
+        with Writer(path, binary=False) as writer:
+            writer.add('doc', {'name': 'ação'})
+        with Reader(path) as reader:
+            assert reader.get_raw('doc') == ('{name: "ação"}'.encode('utf8'), False)
+            assert reader['doc'] == {'name': 'ação'}
+
+    def test_append_and_compact(self, path):
+        with Writer(path, mode='a', binary=False) as writer:
+            assert len(writer) == 2
+            writer.add('a', 'replaced')
+            writer.add('c', None)
+        with Reader(path) as reader:
+            assert dict(reader.items()) == {'a': 'replaced', 'b': Tag('point', {'x': 1, 'y': 2}), 'c': None}
+
+        size = path.stat().st_size
+        compact(path)
+        assert path.stat().st_size < size
+        with Reader(path) as reader:
+            assert dict(reader.items()) == {'a': 'replaced', 'b': Tag('point', {'x': 1, 'y': 2}), 'c': None}
+
+    def test_invalid_archive(self, tmp_path):
+        path = tmp_path / 'invalid.fra'
+        path.write_bytes(b'[1 2 3]' * 10)
+        with pytest.raises(FREDDecodeError):
+            Reader(path)
+
+        path.write_bytes(b'')
+        with pytest.raises(FREDDecodeError):
+            Reader(path)
+        with pytest.raises(FREDDecodeError):
+            Writer(path, mode='a')
+
+    def test_keys_must_be_strings(self, tmp_path):
+        with Writer(tmp_path / 'data.fra') as writer:
+            with pytest.raises(TypeError):
+                writer.add(1, 'value')
@@ -1,8 +1,28 @@
-from fred import Symbol, loads, load
+from array import array
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import Enum
+from fred import Symbol, Tag, FrozenTag, FrozenDict, FREDDecoder, loads, load, dumps
+from fred.hashcons import HashCons
 import pytest
 import io
 
 
+@dataclass
+class Person:
+    name: str
+    age: int = 0
+
+
+@dataclass
+class Full:
+    first_name: str
+
+
+class Color(Enum):
+    RED = 1
+
+
 class TestLoading:
     def test_can_load_from_bytes(self):
         assert loads(b'42') == 42
@@ -14,3 +34,86 @@ class TestLoading:
 
         with pytest.raises(TypeError):
             loads(Symbol('42'))
+
+    def test_json_fast_path(self):
+        src = '{"a": [1, 2.5, null, true, "\\u00e9"], "b": {}}'
+        assert loads(src, use_json=True) == loads(src) == {'a': [1, 2.5, None, True, 'é'], 'b': {}}
+        assert loads('[1 $a]', use_json=True) == [1, Symbol('a')]
+        assert loads('{"a": 1.5}', use_json=True, object_hook=list) == ['a']
+        for src in ['[1.5, 2]', '[1.5 2]', '[1.5 2 $a]']:
+            for use_json in (True, False):
+                data = loads(src, use_json=use_json, parse_float=Decimal, parse_int=str)
+                assert data[:2] == [Decimal('1.5'), '2']
+        assert loads('[1, 2]', use_json=True, array_hook=tuple) == (1, 2)
+
+    @pytest.mark.parametrize('src', ['[NaN]', '[Infinity]', '"\\ud800"', '"\x85"'])
+    def test_json_fast_path_rejects_invalid_fred(self, src):
+        with pytest.raises(ValueError):
+            loads(src, use_json=True)
+
+    def test_tag_types(self):
+        types = {'Person': Person, 'point': complex, 'Decimal': Decimal, 'set': set, 'Color': Color}
+        src = '[Person {name: "Joe" age: 42} (Person name="Ann") point [1 2] Decimal "1.5" set [1] Color $RED x 1]'
+        assert loads(src, tag_types=types) == [
+            Person('Joe', 42), Person('Ann'), 1 + 2j, Decimal('1.5'), {1}, Color.RED, Tag('x', 1),
+        ]
+        assert loads('Person(age=3) {name: "Joe"}', tag_types=[Person]) == Person('Joe', 3)
+        assert loads('Full {first-name: "Joe"}', tag_types=[Full]) == Full('Joe')
+        assert loads('(Full first-name="Joe")', tag_types=[Full]) == Full('Joe')
+
+        value = [Person('Joe', 42), Decimal('1.10'), {1}, Color.RED]
+        assert loads(dumps(value, tag_types=True), tag_types=types) == value
+
+    def test_frozen(self):
+        data = loads('{a: [1 {b: 2}] c: foo (x=[1]) [3]}', frozen=True)
+        assert data == {'a': (1, {'b': 2}), 'c': Tag('foo', (3,), x=(1,))}
+        assert type(data) is FrozenDict and type(data['a'][1]) is FrozenDict
+        assert type(data['c']) is FrozenTag and repr(data['c']) == "FrozenTag('foo', (3,), x=(1,))"
+        assert {data: 1}[loads('{c: foo (x=[1]) [3] a: [1 {b: 2}]}', frozen=True)] == 1
+        assert loads('[1]', frozen=True, use_json=True) == (1,)
+
+    def test_hash_cons(self):
+        decoder = FREDDecoder(hash_cons=True)
+        data = decoder.decode('[{u: m [1 2] p: p(x=1) {}} {u: m [1 2] p: p(x=1) {}} [1 2]]')
+        assert data == ({'u': Tag('m', (1, 2)), 'p': Tag('p', {}, x=1)},) * 2 + ((1, 2),)
+        assert data[0] is data[1] and data[0]['u'].value is data[2]
+        assert type(data[0]['u']) is FrozenTag
+        assert decoder.hash_cons.nodes == 14 and decoder.hash_cons.unique == 7
+
+        data = loads('[{a: 1} {a: 1.0} {a: true} [0.0] [-0.0] [0.0]]', hash_cons=True)
+        assert [type(x['a']) for x in data[:3]] == [int, float, bool]
+        assert data[3] is data[5] and data[3] is not data[4]
+
+    def test_hash_cons_shared_between_documents(self):
+        table = HashCons()
+        a = loads('{x: [1 2]}', hash_cons=table)
+        b = loads('[[1 2] {x: [1 2]}]', hash_cons=table)
+        assert b[1] is a and b[0] is a['x']
+        assert table.ratio == 2.0
+
+    def test_typed_arrays(self):
+        data = loads('[f64 [1 2.5] i8 [-1] u16 [] f64 (unit="m") [1] other [1]]', typed_arrays=True)
+        assert data == [array('d', [1, 2.5]), array('b', [-1]), array('H'), Tag('f64', [1], unit='m'), Tag('other', [1])]
+        assert type(data[0]) is array
+        assert loads(dumps(data), typed_arrays='array') == data
+
+        assert loads('i8 [1 2]', typed_arrays=True, frozen=True) == array('b', [1, 2])
+        assert loads('i8 [1 2]', typed_arrays=True, hash_cons=True) == array('b', [1, 2])
+
+        with pytest.raises(ValueError):
+            loads('i8 [1000]', typed_arrays=True)
+
+    def test_typed_arrays_as_numpy(self):
+        np = pytest.importorskip('numpy')
+        data = loads('[f32 [1 2.5] u8 [255]]', typed_arrays='numpy')
+        assert data[0].dtype == np.float32 and data[0].tolist() == [1, 2.5]
+        assert data[1].dtype == np.uint8 and data[1].tolist() == [255]
+        assert loads('u8 [1 2]', typed_arrays='numpy', frozen=True).tolist() == [1, 2]
+
+    @pytest.mark.parametrize('kind', ['array', 'numpy'])
+    @pytest.mark.parametrize('src', ['i32 [1.5]', 'u8 [-1]', 'i8 [1000]', 'f64 ["1.5"]'])
+    def test_invalid_typed_arrays(self, kind, src):
+        if kind == 'numpy':
+            pytest.importorskip('numpy')
+        with pytest.raises(ValueError):
+            loads(src, typed_arrays=kind)
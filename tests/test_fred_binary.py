@@ -0,0 +1,64 @@
+import io
+import math
+from datetime import date, time, datetime, timedelta, timezone
+
+import pytest
+from hypothesis import given
+
+import fred
+from fred import Tag, Symbol, binary
+from fred import hypothesis as f
+
+EXAMPLES = [
+    None, True, False, 0, -1, 2 ** 100, -2 ** 100, 1.5, math.inf, -math.inf,
+    'text', 'ação', '\ud800', b'\x00bytes', Symbol('symbol'), Symbol('with space'),
+    [1, [2, []]], {'a': {'b': None}},
+    Tag('point', {'x': 1, 'y': 2}, color=Symbol('red')),
+    Tag.new('flag', {'enabled': True}, None),
+    date(2000, 1, 2), time(1, 2, 3, 4), time(23, 59, tzinfo=timezone(timedelta(hours=-3))),
+    datetime(2000, 1, 2, 3, 4, 5, 6), datetime(2000, 1, 2, tzinfo=timezone.utc),
+]
+
+
+class TestBinaryFormat:
+    @pytest.mark.parametrize('data', EXAMPLES)
+    def test_round_trip(self, data):
+        assert binary.loads(binary.dumps(data)) == data
+
+    def test_nan(self):
+        assert math.isnan(binary.loads(binary.dumps(math.nan)))
+
+    def test_keys_are_normalized_as_in_the_text_format(self):
+        data = {1: 3, 1.5: 4, Symbol('a'): 5, 'b': (6,)}
+        assert binary.loads(binary.dumps(data)) == fred.loads(fred.dumps(data))
+        assert binary.loads(binary.dumps({True: 1, None: 2})) == {'true': 1, 'null': 2}
+
+    def test_repeated_strings_are_stored_once(self):
+        rows = [{'name': Symbol('value'), 'other': Tag('tag', i)} for i in range(100)]
+        data = binary.dumps(rows)
+        assert data.count(b'name') == data.count(b'value') == data.count(b'tag') == 1
+        assert binary.loads(data) == rows
+
+    def test_file_api(self):
+        fd = io.BytesIO()
+        binary.dump([1, 2], fd)
+        fd.seek(0)
+        assert binary.load(fd) == [1, 2]
+
+    def test_default(self):
+        assert binary.loads(binary.dumps({1, 2}, default=sorted)) == [1, 2]
+        with pytest.raises(TypeError):
+            binary.dumps(object())
+
+    @pytest.mark.parametrize('data', [b'', b'FRB\x01', b'FRB\x01\xff', b'FRB\x01\x05\x10a', b'FRB\x01\x00\x00'])
+    def test_invalid_data(self, data):
+        with pytest.raises(fred.FREDDecodeError):
+            binary.loads(data)
+
+
+@pytest.mark.hypothesis
+class TestBinaryRoundTrips:
+    @given(f.fred_data())
+    def test_round_trips_like_the_text_format(self, data):
+        result = binary.loads(binary.dumps(data))
+        assert fred.dumps(result) == fred.dumps(data)
@@ -0,0 +1,63 @@
+import hashlib
+import math
+
+import pytest
+from hypothesis import given
+
+import fred
+from fred import Tag, Symbol, FrozenDict, binary, canonical
+from fred import hypothesis as f
+
+
+class TestCanonicalForm:
+    def test_known_bytes(self):
+        assert canonical.dumps(None) == b'FRC\x01\x00'
+        assert canonical.dumps(-2) == b'FRC\x01\x03\x03'
+        assert canonical.dumps(math.nan) == b'FRC\x01\x04' + bytes.fromhex('000000000000f87f')
+        assert canonical.dumps({'b': 1, 'a': [True]}) == b'FRC\x01\x08\x02\x01a\x07\x01\x02\x01b\x03\x02'
+        assert canonical.dumps(Tag('t', 'x', k=Symbol('s'))) == b'FRC\x01\x0a\x01t\x01\x01k\x09\x01s\x05\x01x'
+
+    def test_dicts_are_order_independent(self):
+        a = {'x': 1, 'y': {'b': 2, 'a': 3}}
+        b = {'y': {'a': 3, 'b': 2}, 'x': 1}
+        assert canonical.dumps(a) == canonical.dumps(b) == canonical.dumps(FrozenDict(b))
+        assert canonical.dumps(Tag('t', b=1, a=2)) == canonical.dumps(Tag('t', a=2, b=1))
+
+    def test_types_are_distinct(self):
+        values = [1, 1.0, True, '1', Symbol('a'), 'a', 0.0, -0.0, [], {}, None]
+        assert len({canonical.dumps(x) for x in values}) == len(values)
+        assert canonical.dumps((1, 2)) == canonical.dumps([1, 2])
+
+    def test_keys_are_normalized(self):
+        assert canonical.dumps({1: 'x'}) == canonical.dumps({'1': 'x'})
+        with pytest.raises(ValueError):
+            canonical.dumps({1: 'x', '1': 'y'})
+
+    def test_default(self):
+        assert canonical.dumps(1 + 2j, default=lambda z: [z.real, z.imag]) == canonical.dumps([1.0, 2.0])
+        with pytest.raises(TypeError):
+            canonical.dumps(1 + 2j)
+
+    @given(f.fred_data())
+    def test_stable_across_binary_round_trip(self, data):
+        assert canonical.dumps(binary.loads(binary.dumps(data))) == canonical.dumps(data)
+
+
+class TestHash:
+    def test_hash(self):
+        data = {'items': list(range(50_000)), 'tag': Tag('x', 1)}
+        digest = hashlib.sha256(canonical.dumps(data)).hexdigest()
+        assert fred.hash(data) == digest
+        assert fred.hash(data, 'md5') == hashlib.md5(canonical.dumps(data)).hexdigest()
+
+    def test_streams_in_chunks(self):
+        chunks = []
+        canonical.write(list(range(10_000)), chunks.append, chunk_size=1024)
+        assert len(chunks) > 10 and max(map(len, chunks)) < 1100
+        assert b''.join(chunks) == canonical.dumps(list(range(10_000)))
+
+    def test_star_import_keeps_builtin_hash(self):
+        namespace = {}
+        exec('from fred import *', namespace)
+        assert 'hash' not in namespace and 'loads' in namespace
+        assert fred.hash(1) == canonical.hash(1)
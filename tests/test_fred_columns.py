@@ -0,0 +1,54 @@
+from datetime import date, datetime
+
+import pytest
+
+from fred import loads_columns, Symbol, Tag
+
+np = pytest.importorskip('numpy')
+
+SRC = '''
+data (source="sensors") [
+    {ts: 2020-01-01T10:00:00 value: 1.5 count: 1 sensor: $a ok: true}
+    {ts: 2020-01-01T10:00:01 value: 2 count: 2 sensor: $b ok: false}
+    {ts: 2020-01-01T10:00:02 count: 3 sensor: $a ok: true extra: {x: 1}}
+]
+'''
+
+
+class TestColumns:
+    def test_typed_columns(self):
+        cols = loads_columns(SRC)
+        assert list(cols) == ['ts', 'value', 'count', 'sensor', 'ok', 'extra']
+        assert cols['ts'].dtype == np.dtype('datetime64[us]')
+        assert cols['ts'][1] == np.datetime64(datetime(2020, 1, 1, 10, 0, 1))
+        assert cols['value'].dtype == np.float64
+        assert cols['value'][:2].tolist() == [1.5, 2.0] and np.isnan(cols['value'][2])
+        assert cols['count'].dtype == np.int64 and cols['count'].tolist() == [1, 2, 3]
+        assert cols['ok'].dtype == bool
+        assert cols['sensor'].dtype == object and cols['sensor'].tolist() == [Symbol('a'), Symbol('b'), Symbol('a')]
+        assert cols['extra'].tolist() == [None, None, {'x': 1}]
+
+    def test_categories(self):
+        cols = loads_columns(SRC, categories=True)
+        assert cols['sensor'].codes.tolist() == [0, 1, 0]
+        assert cols['sensor'].categories.tolist() == [Symbol('a'), Symbol('b')]
+
+    def test_path(self):
+        src = '{meta: {n: 2} rows: [{day: 2020-01-01} {day: 2020-01-02 name: "x"}]}'
+        cols = loads_columns(src, path=['rows'])
+        assert cols['day'].dtype == np.dtype('datetime64[D]')
+        assert cols['day'][0] == np.datetime64(date(2020, 1, 1))
+        assert cols['name'].tolist() == [None, 'x']
+
+        with pytest.raises(TypeError):
+            loads_columns(src, path=['meta'])
+
+    def test_tags_in_values_keep_dicts(self):
+        cols = loads_columns('[{t: tag (a=1) {b: [{c: 2}]}}]')
+        assert cols['t'][0] == Tag('tag', {'b': [{'c': 2}]}, a=1)
+
+    def test_repeated_keys_keep_the_last_value(self):
+        cols = loads_columns('[{a: 1 b: 1 a: 2} {a: 3 b: 2} {a: 4 b: 3 c: "x" c: "y"}]')
+        assert cols['a'].tolist() == [2, 3, 4]
+        assert cols['b'].tolist() == [1, 2, 3]
+        assert cols['c'].tolist() == [None, None, 'y']
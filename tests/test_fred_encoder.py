@@ -1,9 +1,16 @@
 import io
+from array import array
+from dataclasses import dataclass
 from datetime import date, time, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import NamedTuple
+from uuid import UUID
 
 import pytest
 
-from fred import dumps, Tag, Symbol, dump
+from fred import dumps, dumpb, Tag, Symbol, dump, FREDEncoder
+from fred.encoder import iterencode_parallel
 
 
 class TestFileDump:
@@ -12,6 +19,36 @@ class TestFileDump:
         dump('value', fd)
         assert fd.getvalue() == '"value"'
 
+    def test_dump_coalesces_writes(self):
+        class Writer(io.StringIO):
+            calls = 0
+
+            def write(self, data):
+                self.calls += 1
+                return super().write(data)
+
+        data = [{'key': i, 'value': [i, str(i)]} for i in range(1000)]
+        fd = Writer()
+        dump(data, fd)
+        assert fd.getvalue() == dumps(data)
+        assert fd.calls == 1
+
+        fd = Writer()
+        dump(data, fd, chunk_size=1024)
+        assert fd.getvalue() == dumps(data)
+        assert 1 < fd.calls < len(data)
+
+    def test_dump_to_binary_file(self):
+        fd = io.BytesIO()
+        dump(['café', Symbol('ação')], fd)
+        assert fd.getvalue() == '["café" $ação]'.encode('utf8')
+
+    def test_iterencode_chunk_size(self):
+        data = [list(range(100))] * 10
+        chunks = list(FREDEncoder().iterencode(data, chunk_size=100))
+        assert ''.join(chunks) == dumps(data)
+        assert all(len(chunk) >= 100 for chunk in chunks[:-1])
+
 
 class TestFredEncoder:
 
@@ -45,6 +82,14 @@ class TestFredEncoder:
         assert dumps(Symbol('symbol')) == '$symbol'
         assert dumps(Symbol('escaped symbol')) == '$"escaped symbol"'
 
+    def test_non_ascii_strings(self):
+        assert dumps('café') == r'"caf\u00e9"'
+        assert dumps('café', ensure_ascii=False) == '"café"'
+        assert dumps({'chave': Symbol('não é nome')}, ensure_ascii=False) == '{chave: $"não é nome"}'
+        assert dumps('\x00\x7f\x9f\n"', ensure_ascii=False) == r'"\u0000\u007f\u009f\n\""'
+        assert dumpb(['café', 'ß']) == '["café" "ß"]'.encode('utf8')
+        assert dumpb('é', ensure_ascii=True) == b'"\\u00e9"'
+
     def test_list_encoder(self):
         assert dumps([]) == '[]'
         assert dumps([1, 2, 3, 4]) == '[1 2 3 4]'
@@ -116,6 +161,110 @@ class TestFredEncoder:
     def test_indented_decoder(self):
         assert dumps([{'foo': 42, 'bar': {'ham': 'spam'}}], indent=4) == EXAMPLE_1
 
+    @pytest.mark.parametrize('kwargs', [{}, {'indent': 4}, {'sort_keys': True, 'indent': '\t'}])
+    def test_one_shot_encoder_matches_iterencode(self, kwargs):
+        class Text(str):
+            pass
+
+        data = [
+            {'foo': [1, 2.0, None, True], 'bar': {}, '42': Text('text'), 'baz': (date(2000, 1, 1),)},
+            Tag.new('Tag', {'attr': [1, 2], 'quoted attr': {}}, None),
+            Tag('Tag', [Tag('Inner', {'a': b'bytes'})], attr=Symbol('symbol')),
+            1 + 2j,
+        ]
+        encoder = FREDEncoder(default=str, **kwargs)
+        assert encoder.encode(data) == ''.join(encoder.iterencode(data))
+
+    def test_json_subtrees(self):
+        data = {'json': [{'a': 1, 'b': [2.5, None]}], 'fred': [Symbol('a'), {'b': True}]}
+        assert dumps(data, use_json=True) == '{json: [{"a": 1 "b": [2.5 null]}] fred: [$a {"b": true}]}'
+        assert dumps({'a': [float('inf'), (1,)], 1: 'b'}, use_json=True) == '{a: [inf [1]] "1": "b"}'
+        assert dumps(Tag('tag', {'a': []}), use_json=True) == 'tag {"a": []}'
+
+        # Subclasses of JSON types and non-ASCII output use the FRED encoder
+        assert dumps([Point(1, 2)], use_json=True) == '[[1 2]]'
+        assert dumps({'a': 'é'}, use_json=True, ensure_ascii=False) == '{a: "é"}'
+        assert dumps({'a': 1}, use_json=True, indent=2) == '{\n  a: 1\n}'
+
+    def test_records_with_repeated_keys(self):
+        assert dumps([{1: 0}, {True: 0}, {1.0: 0}, {Symbol('1'): 0}]) == '[{"1": 0} {true: 0} {"1.0": 0} {"1": 0}]'
+        rows = [{'b': 1, 'a': 2}, {'a': 3, 'b': 4}, {'b': 5, 'a': 6}]
+        assert dumps(rows) == '[{b: 1 a: 2} {a: 3 b: 4} {b: 5 a: 6}]'
+        assert dumps(rows, sort_keys=True) == '[{a: 2 b: 1} {a: 3 b: 4} {a: 6 b: 5}]'
+        rows = [{'a': 1, (): 2, 'b': 3}] * 2
+        assert dumps(rows, skip_keys=True) == '[{a: 1 b: 3} {a: 1 b: 3}]'
+        assert dumps([Tag('t', {'a': 1}, a=1)] * 2) == '[t (a=1) {a: 1} t (a=1) {a: 1}]'
+
+    def test_equal_keys_with_different_representations(self):
+        for ensure_ascii in (True, False):
+            assert dumps({0.0: 1}, ensure_ascii=ensure_ascii) == '{"0.0": 1}'
+            assert dumps({-0.0: 1}, ensure_ascii=ensure_ascii) == '{"-0.0": 1}'
+            assert dumps([{0.0: 1}, {-0.0: 1}], ensure_ascii=ensure_ascii) == '[{"0.0": 1} {"-0.0": 1}]'
+
+    def test_width(self):
+        data = {'name': 'fred', 'numbers': list(range(20)), 'tag': Tag('tag', {'a': 1}, attr=True)}
+        assert dumps(data, width=120) == dumps(data) == \
+            '{name: "fred" numbers: [0 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16 17 18 19] tag: tag (attr=true) {a: 1}}'
+        assert dumps(data, width=30) == (
+            '{\n'
+            '  name: "fred"\n'
+            '  numbers: [\n'
+            '    0 1 2 3 4 5 6 7 8 9 10 11\n'
+            '    12 13 14 15 16 17 18 19\n'
+            '  ]\n'
+            '  tag: tag (attr=true) {a: 1}\n'
+            '}'
+        )
+        assert dumps([[1, 2], {}, Tag.new('t', {'a': 1, 'b': 2}, None)], width=10, indent=4) == \
+            '[\n    [1 2]\n    {}\n    (t a=1\n        b=2)\n]'
+
+    def test_iterators(self):
+        squares = lambda n: (i * i for i in range(n))
+        assert dumps({'a': squares(3), 'b': squares(0), 'c': iter([iter('ab')])}) == \
+            '{a: [0 1 4] b: [] c: [["a" "b"]]}'
+        assert dumps(squares(2), indent=2) == '[\n  0\n  1\n]'
+        with pytest.raises(TypeError):
+            dumps(squares(2), iter_types=())
+
+    def test_iterencode_consumes_iterators_lazily(self):
+        consumed = []
+
+        def rows():
+            for i in range(3):
+                consumed.append(i)
+                yield {'id': i}
+
+        chunks = FREDEncoder().iterencode(rows())
+        assert next(chunks) == '['
+        assert consumed == [0]
+        assert ''.join(chunks) == '{id: 0} {id: 1} {id: 2}]'
+        assert consumed == [0, 1, 2]
+
+        consumed.clear()
+        fd = io.StringIO()
+        dump(Tag('rows', rows()), fd)
+        assert fd.getvalue() == 'rows [{id: 0} {id: 1} {id: 2}]'
+
+    @pytest.mark.parametrize('kwargs', [
+        {}, {'indent': 2}, {'width': 30}, {'width': 60, 'indent': 4},
+        {'sort_keys': True, 'separators': (', ', ': ', '=')},
+    ])
+    def test_parallel_encoding(self, kwargs):
+        rows = [{'id': i, 'name': Symbol('row'), 'values': [i, {'day': date(2000, 1, i + 1)}]} for i in range(5)]
+        for obj in [rows, tuple(rows), Tag('rows', rows, key='value'), rows[0]]:
+            chunks = iterencode_parallel(obj, 2, slice_size=2, **kwargs)
+            assert ''.join(chunks) == dumps(obj, **kwargs)
+
+        fd = io.StringIO()
+        dump(rows, fd, workers=2, **kwargs)
+        assert fd.getvalue() == dumps(rows, workers=2, **kwargs) == dumps(rows, **kwargs)
+
+    @pytest.mark.parametrize('kwargs', [{}, {'sort_keys': True}, {'separators': (', ', ': ', '=')}])
+    def test_json_subtrees_match_iterencode(self, kwargs):
+        data = [{'foo': [1, 2.0, None, True], 'bar': {}}, Tag('Tag', [{'a': (1, 2)}]), {1: [{}]}]
+        encoder = FREDEncoder(use_json=True, **kwargs)
+        assert encoder.encode(data) == ''.join(encoder.iterencode(data))
+
 
 
 EXAMPLE_1 = '''[
@@ -126,3 +275,94 @@ EXAMPLE_1 = '''[
         }
     }
 ]'''
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+@dataclass
+class Person:
+    name: str
+    age: int
+
+
+@dataclass
+class Name:
+    name: str
+
+
+class Color(Enum):
+    RED = 'red'
+
+
+class TestTypeEncoders:
+    def test_builtin_type_encoders(self):
+        assert dumps(Person('Joe', 42)) == '{name: "Joe" age: 42}'
+        assert dumps(Point(1, 2)) == '[1 2]'
+        assert ''.join(FREDEncoder().iterencode(Point(1, 2))) == '[1 2]'
+        assert dumps(Color.RED) == '"red"'
+        assert dumps(Decimal('1.10')) == '1.10'
+        assert dumps([Decimal('nan'), Decimal('-inf')]) == '[nan -inf]'
+        assert dumps(UUID(int=1)) == '"00000000-0000-0000-0000-000000000001"'
+        assert dumps({1}) == dumps(frozenset([1])) == '[1]'
+
+    def test_typed_arrays(self):
+        assert dumps(array('d', [1.5, float('inf')])) == 'f64 [1.5 inf]'
+        assert dumps([array('b', [-1, 2]), array('H')]) == '[i8 [-1 2] u16 []]'
+        assert dumps(array('f', [0.5]), tag_types=True) == 'f32 [0.5]'
+        assert dumps(array('u', 'ab')) == '["a" "b"]'
+
+    def test_numpy_values(self):
+        np = pytest.importorskip('numpy')
+        assert dumps([np.int64(3), np.float32(0.5), np.bool_(True), np.str_('a')]) == '[3 0.5 true "a"]'
+        assert dumps(np.datetime64('2020-01-02')) == '2020-01-02'
+        assert dumps(np.datetime64('2020-01-02T03:04:05.123456789')) == '2020-01-02_03:04:05.123456'
+        assert dumps(np.datetime64('NaT')) == 'null'
+
+    def test_numpy_arrays(self):
+        np = pytest.importorskip('numpy')
+        assert dumps(np.arange(6).reshape(2, 3)) == '[[0 1 2] [3 4 5]]'
+        assert dumps(np.array([1.5, np.nan, -np.inf])) == '[1.5 nan -inf]'
+        assert dumps(np.array([True, False])) == '[true false]'
+        assert dumps(np.array(['2020-01-01'], dtype='datetime64[D]')) == '[2020-01-01]'
+        assert dumps(np.array(['x', 'y'])) == '["x" "y"]'
+        assert dumps({'a': np.zeros(0), 'b': np.array(5)}) == '{a: [] b: 5}'
+        assert dumps(np.arange(2), tag_types=True) == '[0 1]'
+
+    def test_tagged_type_encoders(self):
+        assert dumps(Person('Joe', 42), tag_types=True) == 'Person {name: "Joe" age: 42}'
+        assert dumps(Point(1, 2), tag_types=True) == 'Point {x: 1 y: 2}'
+        assert dumps(Color.RED, tag_types=True) == 'Color $RED'
+        assert dumps(Decimal('1.10'), tag_types=True) == 'Decimal "1.10"'
+        assert dumps({1}, tag_types=True) == 'set [1]'
+
+    @pytest.mark.parametrize('options', [{}, {'sort_keys': True, 'indent': 2}, {'tag_types': True}])
+    def test_record_type_encoders(self, options):
+        encoder = FREDEncoder(**options)
+        data = [Person('Joe', 42), Point(1, [Person('Ann', 7)]), Name('x'), {'a': Name(Point(0, 0))}]
+        expected = encoder.encode(encoder.type_encoder(Person)(data[0]))
+        assert encoder.encode(data) == ''.join(encoder.iterencode(data))
+        assert encoder.encode(data[0]) == ''.join(encoder.iterencode(data[0])) == expected
+
+    def test_tagged_single_field_dataclass(self):
+        assert dumps(Name('x'), tag_types=True) == 'Name {name: "x"}'
+
+    def test_registered_types(self):
+        encoder = FREDEncoder(types={complex: lambda z: [z.real, z.imag]})
+        assert encoder.encode(1 + 2j) == '[1.0 2.0]'
+        assert ''.join(encoder.iterencode([1 + 2j])) == '[[1.0 2.0]]'
+
+        encoder.register(Point, lambda p: Tag('P', [p.x, p.y]))
+        assert encoder.encode(Point(1, 2)) == 'P [1 2]'
+
+    @pytest.mark.parametrize('use_json', [False, True])
+    def test_registered_container_types(self, use_json):
+        types = {tuple: lambda t: Tag('tup', list(t)), dict: lambda d: Tag('map', list(d.items()))}
+        encoder = FREDEncoder(types=types, use_json=use_json)
+        data = [(1, 2), {'a': 1}]
+        assert encoder.encode(data) == ''.join(encoder.iterencode(data)) == '[tup [1 2] map [tup ["a" 1]]]'
+
+        encoder = FREDEncoder(types={Tag: lambda t: t.value}, use_json=use_json)
+        assert encoder.encode([Tag('x', 1)]) == ''.join(encoder.iterencode([Tag('x', 1)])) == '[1]'
@@ -0,0 +1,41 @@
+from fred.pretty import Begin, Break, END, pretty
+
+
+def words(*items, consistent=False):
+    yield Begin(2, consistent)
+    yield "["
+    yield Break(0)
+    for i, item in enumerate(items):
+        if i:
+            yield Break()
+        if isinstance(item, str):
+            yield item
+        else:
+            yield from item
+    yield Break(0, -2)
+    yield "]"
+    yield END
+
+
+class TestPrettyPrinter:
+    def test_fits_in_a_single_line(self):
+        assert ''.join(pretty(words('a', 'b', 'c'), width=10)) == '[a b c]'
+
+    def test_inconsistent_breaks_fill_lines(self):
+        out = ''.join(pretty(words('aa', 'bb', 'cc', 'dd', 'ee'), width=10))
+        assert out == '[aa bb cc\n  dd ee]'
+
+    def test_consistent_breaks(self):
+        out = ''.join(pretty(words('aa', 'bb', 'cc', consistent=True), width=8))
+        assert out == '[\n  aa\n  bb\n  cc\n]'
+
+    def test_nested_blocks(self):
+        tokens = words('x', list(words('aa', 'bb', consistent=True)), consistent=True)
+        assert ''.join(pretty(tokens, width=80)) == '[x [aa bb]]'
+
+        tokens = words('x', list(words('aaaa', 'bbbb', consistent=True)), consistent=True)
+        assert ''.join(pretty(tokens, width=12)) == '[\n  x\n  [\n    aaaa\n    bbbb\n  ]\n]'
+
+    def test_output_is_streamed(self):
+        chunks = pretty(words(*(['item'] * 1000)), width=20)
+        assert next(chunks).startswith('[item')
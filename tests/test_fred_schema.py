@@ -1,9 +1,13 @@
+import io
+import pickle
 from datetime import date
 
 import pytest
 
-from fred import loads, Tag
+from fred import loads, Tag, Symbol, FrozenTag, FrozenDict, FREDDecodeError
 from fred.schema import parse_schema, schema
+from fred.schema.stream import ValueReader, tokenize
+from fred.schema.utils import LRUCache
 # ------------------------------------------------------------------------------
 # Fixtures
 from fred.schema.validators import make_validator
@@ -48,6 +52,12 @@ class TestFredMakeValidatorFunction:
         validator = make_validator(Tag('Foo', Tag('String')), {})
         assert validator(None, Tag('Foo', 'bar')) == Tag('Foo', 'bar')
 
+    def test_validators_copy_without_context(self):
+        validator = make_validator(Tag('Foo', [Tag('String')]), {})
+        value = ['bar']
+        result = validator(None, Tag('Foo', value))
+        assert result == Tag('Foo', ['bar']) and result.value is not value
+
 
 class TestFredSchemaParser:
     def test_happy_validating_parsing(self, schema_src):
@@ -72,3 +82,226 @@ class TestFredSchemaParser:
         with pytest.raises(TypeError) as e:
             person.loads('Person {first-name: null}')
             print(e)
+
+    def test_validate_in_place(self, schema_src):
+        person = schema(schema_src)
+        data = Tag('Person', {'first-name': 'Joe', 'last-name': 'Smith'})
+        value = data.value
+
+        copy = person.validate(data)
+        assert copy == Tag('Person', {'first-name': 'Joe', 'last-name': 'Smith', 'birthday': None})
+        assert copy.value is not value
+        assert value == {'first-name': 'Joe', 'last-name': 'Smith'}
+
+        result = person.validate(data, copy=False)
+        assert result is data
+        assert result.value is value
+        assert value == {'first-name': 'Joe', 'last-name': 'Smith', 'birthday': None}
+
+        # Frozen containers are copied
+        expected = Tag('Person', {'first-name': 'Joe', 'last-name': None, 'birthday': None})
+        frozen = FrozenTag('Person', FrozenDict({'first-name': 'Joe'}))
+        result = person.validate(frozen, copy=False)
+        assert result == expected and type(result.value) is FrozenDict
+        assert frozen.value == {'first-name': 'Joe'}
+        for kwargs in [{'frozen': True}, {'hash_cons': True}]:
+            result = schema(schema_src, **kwargs).loads('Person {first-name: "Joe"}')
+            assert result == expected and type(result.value) is FrozenDict
+
+        people = schema(schema_src.replace('Schema/Person', 'Schema/People').replace(
+            '    ]', '        People [(Person)]\n    ]'), frozen=True)
+        result = people.loads('People [Person {first-name: "Joe"}]')
+        assert result == Tag('People', (expected,)) and type(result.value) is tuple
+
+    def test_validate_many(self, schema_src):
+        person = schema(schema_src)
+        data = [
+            Tag('Person', {'first-name': 'Joe'}),
+            Tag('Person', {'first-name': None}),
+            Tag('Person', {'first-name': 'Mary', 'last-name': 'Smith'}),
+        ]
+        expected = [
+            Tag('Person', {'first-name': 'Joe', 'last-name': None, 'birthday': None}),
+            Tag('Person', {'first-name': 'Mary', 'last-name': 'Smith', 'birthday': None}),
+        ]
+
+        for workers in (None, 2):
+            result = person.validate_many(data, workers=workers, chunk_size=2, return_errors=True)
+            assert [result[0], result[2]] == expected
+            assert isinstance(result[1], TypeError)
+
+            with pytest.raises(TypeError):
+                person.validate_many(data, workers=workers)
+
+            assert person.validate_many([data[0], data[2]], workers=workers) == expected
+
+            result = person.validate_many([1, data[0]], workers=workers, return_errors=True)
+            assert isinstance(result[0], TypeError) and result[1] == expected[0]
+
+    def test_schema_can_be_pickled(self, schema_src):
+        person = pickle.loads(pickle.dumps(schema(schema_src)))
+        assert person.loads('Person {first-name: "Joe"}') == \
+               Tag('Person', {'first-name': 'Joe', 'last-name': None, 'birthday': None})
+
+    def test_iter_load_list(self, schema_src):
+        people = schema(schema_src.replace('Schema/Person', 'Schema/People').replace(
+            '    ]', '        People [(Person)]\n    ]'))
+        src = '''People [
+            Person {first-name: "Joe"}
+            Person {first-name: null}  ; invalid
+            Person {first-name: "Mary", birthday: 1970-01-01}
+        ]'''
+
+        result = list(people.iter_load(io.StringIO(src), return_errors=True))
+        assert result[0] == Tag('Person', {'first-name': 'Joe', 'last-name': None, 'birthday': None})
+        assert isinstance(result[1], TypeError)
+        assert result[2] == Tag('Person', {'first-name': 'Mary', 'birthday': date(1970, 1, 1), 'last-name': None})
+
+        items = people.iter_load(io.BytesIO(src.encode('utf8')))
+        assert next(items) == result[0]
+        with pytest.raises(TypeError):
+            next(items)
+
+    def test_iter_load_object(self, schema_src):
+        person = schema(schema_src)
+        src = 'Person {"first-name": "Joe", birthday:null}'
+        assert list(person.iter_load(io.StringIO(src))) == \
+               [('first-name', 'Joe'), ('birthday', None), ('last-name', None)]
+
+        with pytest.raises(ValueError):
+            list(person.iter_load(io.StringIO('Person {last-name: "Smith"}')))
+
+
+class TestFredSchemaStream:
+    @pytest.mark.parametrize('chunk_size', [1, 3, 1024])
+    def test_split_list_elements(self, chunk_size):
+        src = 'Root (attr=1) [1 "two" $"three" Tag (a=1) [4] (tag x=5) \\"tag" 6 Outer Inner {a: [7]}]'
+        reader = ValueReader(tokenize(io.StringIO(src), chunk_size))
+        assert reader.header() == ('Root', '[')
+        assert [loads(item) for item in reader.items()] == [
+            1, 'two', Symbol('three'), Tag('Tag', [4], a=1), Tag('tag', x=5), Tag('tag', 6),
+            Tag('Outer', Tag('Inner', {'a': [7]})),
+        ]
+
+    def test_split_object_pairs(self):
+        src = 'Root {a: 1 b:2 "c": 3 d :Tag 4}'
+        reader = ValueReader(tokenize(io.StringIO(src)))
+        assert reader.header() == ('Root', '{')
+        assert [(k, loads(v)) for k, v in reader.pairs()] == [
+            ('a', 1), ('b', 2), ('"c"', 3), ('d', Tag('Tag', 4)),
+        ]
+
+    @pytest.mark.parametrize('chunk_size', [3, 1024])
+    def test_only_blanks_after_root(self, chunk_size):
+        reader = ValueReader(tokenize(io.StringIO('L ["a" "b"] ; comment\n '), chunk_size))
+        reader.header()
+        assert list(reader.items()) == ['"a"', '"b"']
+
+        reader = ValueReader(tokenize(io.StringIO('L ["a" "b"] garbage ] {'), chunk_size))
+        reader.header()
+        with pytest.raises(FREDDecodeError):
+            list(reader.items())
+
+        reader = ValueReader(tokenize(io.StringIO('R {a: 1} 2'), chunk_size))
+        reader.header()
+        with pytest.raises(FREDDecodeError):
+            list(reader.pairs())
+
+    def test_tokens_longer_than_chunks(self):
+        text = '"' + 'x\\"' * 10_000 + '"'
+        tokens = list(tokenize(io.StringIO(f'[{text} word{"y" * 5000}]'), chunk_size=16))
+        assert tokens == [('open', '['), ('string', text), ('ws', ' '), ('word', 'word' + 'y' * 5000), ('close', ']')]
+
+
+class TestFredSchemaEncoder:
+    def test_dumps(self, schema_src):
+        person = schema(schema_src)
+        joe = Tag('Person', {'birthday': date(1970, 1, 1), 'first-name': 'Joe'})
+        src = 'Person {first-name: "Joe" last-name: null birthday: 1970-01-01}'
+        assert person.dumps(joe) == src
+        assert person.dumps(joe, validate=True) == src
+        assert person.loads(src) == person.validate(joe)
+
+        fd = io.StringIO()
+        person.dump(Tag('Person', {'first-name': 'Joe'}, x=1), fd)
+        assert fd.getvalue() == 'Person (x=1) {first-name: "Joe" last-name: null birthday: null}'
+
+    def test_dumps_validation(self, schema_src):
+        person = schema(schema_src)
+
+        with pytest.raises(TypeError):
+            person.dumps(Tag('Person', {'first-name': 42}), validate=True)
+        with pytest.raises(ValueError):
+            person.dumps(Tag('Person', {'last-name': 'Smith'}), validate=True)
+        with pytest.raises(ValueError):
+            person.dumps(Tag('Person', {'first-name': 'Joe', 'age': 42}), validate=True)
+
+
+class TestFredSchemaCache:
+    def test_memoize_frozen_tags(self):
+        src = '''
+        Schema/Measure (id="tests") [
+            Unit (String)
+            Measure {
+                value: (Float)
+                unit: (Unit)
+            }
+        ]
+        '''
+        measure = schema(src, cache_size=8)
+        unit = FrozenTag('Unit', 'm')
+        first = measure.validate(Tag('Measure', {'value': 1.0, 'unit': unit}))
+        second = measure.validate(Tag('Measure', {'value': 2.0, 'unit': FrozenTag('Unit', 'm')}))
+        assert first.value['unit'] == unit
+        assert type(first.value['unit']) is FrozenTag
+        assert second.value['unit'] is first.value['unit']
+
+        # Mutable or unhashable values are not cached
+        assert measure.validate(Tag('Measure', {'value': 1.0, 'unit': Tag('Unit', 'm')})) == first
+        with pytest.raises(TypeError):
+            measure.validate(Tag('Measure', {'value': 1.0, 'unit': FrozenTag('Unit', 42)}))
+
+    def test_cached_results_are_immutable(self):
+        src = '''
+        Schema/Measure (id="tests") [
+            Unit {name: (String) symbol: (String?)}
+            Measure {
+                value: (Float)
+                unit: (Unit)
+            }
+        ]
+        '''
+        measure = schema(src, cache_size=8)
+        data = Tag('Measure', {'value': 1.0, 'unit': FrozenTag('Unit', FrozenDict(name='meter'))})
+        result = measure.validate(data)
+        unit = result.value['unit']
+        assert unit == FrozenTag('Unit', {'name': 'meter', 'symbol': None})
+        assert type(unit.value) is FrozenDict
+        with pytest.raises(TypeError):
+            unit.value['name'] = 'km'
+        assert measure.validate(data).value['unit'].value['name'] == 'meter'
+
+    def test_cache_keys_are_type_sensitive(self):
+        src = '''
+        Schema/Values (id="tests") [
+            V (Float)
+            T {x: (Float)}
+            Values {v: (V) t: (T)}
+        ]
+        '''
+        values = schema(src, cache_size=8)
+        valid = Tag('Values', {'v': FrozenTag('V', 1.0), 't': FrozenTag('T', FrozenDict(x=1.0))})
+        assert values.validate(valid) == valid
+        with pytest.raises(TypeError):
+            values.validate(Tag('Values', {'v': FrozenTag('V', 1), 't': FrozenTag('T', FrozenDict(x=1.0))}))
+        with pytest.raises(TypeError):
+            values.validate(Tag('Values', {'v': FrozenTag('V', 1.0), 't': FrozenTag('T', FrozenDict(x=1))}))
+
+    def test_lru_cache_is_bounded(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        assert cache.get('a') == 1
+        cache['c'] = 3
+        assert 'b' not in cache
+        assert len(cache) == 2 and cache.get('a') == 1 and cache.get('c') == 3
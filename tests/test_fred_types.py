@@ -2,7 +2,7 @@ import pickle
 
 import pytest
 
-from fred import Tag, Symbol, FrozenTag, FREDDecodeError
+from fred import Tag, Symbol, FrozenTag, FrozenDict, FREDDecodeError, loads
 
 
 class TestSymbolType:
@@ -33,6 +33,9 @@ class TestSymbolType:
         assert Symbol('foo') == 'foo'
         assert Symbol('foo') != b'foo'
 
+    def test_pickle(self):
+        assert pickle.loads(pickle.dumps(Symbol('foo'))) is Symbol('foo')
+
 
 class TestTagType:
     def test_constructor(self):
@@ -105,6 +108,48 @@ class TestTagType:
         with pytest.raises(TypeError):
             print(hash(tag))
 
+    def test_pickle(self):
+        tag = FrozenTag('foo', Symbol('bar'), baz=42)
+        hash(tag)
+        clone = pickle.loads(pickle.dumps(tag))
+        assert type(clone) is FrozenTag
+        assert clone == tag
+        assert not hasattr(clone, '_hash')
+
+    def test_compact_tags(self):
+        a, b = loads('[foo 1 foo (x=1) 2]', compact_tags=True)
+        assert a == Tag('foo', 1) and b == Tag('foo', 2, x=1)
+        assert a.tag is b.tag
+        assert a.split()[1] is Tag.compact('bar', {}, 3).split()[1]
+
+        a.attrs['y'] = 2
+        assert a == Tag('foo', 1, y=2)
+        assert pickle.loads(pickle.dumps(Tag.compact('bar', {}, 3))) == Tag('bar', 3)
+
+
+class TestFrozenDictType:
+    def test_immutable(self):
+        data = FrozenDict(a=1)
+        with pytest.raises(TypeError):
+            data['b'] = 2
+        with pytest.raises(TypeError):
+            data.update(b=2)
+        with pytest.raises(TypeError):
+            del data['a']
+        assert data == {'a': 1}
+
+    def test_hash(self):
+        assert hash(FrozenDict(a=1, b=2)) == hash(FrozenDict(b=2, a=1))
+        data = FrozenDict(a=[])
+        with pytest.raises(TypeError):
+            hash(data)
+        assert data._hash == -1
+
+    def test_pickle(self):
+        data = FrozenDict(a=(1, 2))
+        clone = pickle.loads(pickle.dumps(data))
+        assert type(clone) is FrozenDict and clone == data
+
 
 class TestExceptionType:
     def test_constructor(self):